@@ -0,0 +1,65 @@
+"""SQLite-backed exact-match cache for LLM responses used by the grant agents."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+
+
+class LLMResponseCache:
+    """Persist raw model responses keyed by a hash of everything that shaped them."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "DELETE FROM cache WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        response, created_at = row
+        if created_at < time.time() - self.ttl_seconds:
+            return None
+        return response
+
+    def set(self, key: str, response: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
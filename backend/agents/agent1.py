@@ -31,13 +31,15 @@ JAMAIBASE_API_KEY = (
     or os.getenv("JAMAI_PAT")
 )
 SCRAP_TABLE_ID = os.getenv("JAMAI_SCRAP_RESULT_TABLE_ID", "scrap_result")
+# How long setup_daily_cron sleeps when the schedule has no jobs at all
+CRON_IDLE_FALLBACK_SECONDS = 60
 
 # Initialize JamAI client globally (fallback for CLI usage)
 jamai = None
 if JAMAIBASE_PROJECT_ID and JAMAIBASE_API_KEY:
     jamai = JamAI(project_id=JAMAIBASE_PROJECT_ID, token=JAMAIBASE_API_KEY)
 
-@dataclass
+@dataclass(slots=True)
 class GrantEntry:
     """Structure for grant entries in JamAIBase scrap_result Table"""
     id: str
@@ -45,7 +47,7 @@ class GrantEntry:
     updated_at: str
     status: str = "active"
 
-@dataclass
+@dataclass(slots=True)
 class ScraperRunSummary:
     """Structured summary for orchestrators and logs."""
 
@@ -93,8 +95,11 @@ class ScraperRunSummary:
         }
 
 
+_MYT = pytz.timezone("Asia/Kuala_Lumpur")
+
+
 def _now_iso() -> str:
-    return datetime.now(pytz.timezone("Asia/Kuala_Lumpur")).isoformat()
+    return datetime.now(_MYT).isoformat()
 
 
 class WebScraperAgent:
@@ -480,7 +485,7 @@ class WebScraperAgent:
             grant_entry = GrantEntry(
                 id=entry_id,
                 grant_scrap=grant_scrap_json,  # Now storing as JSON string
-                updated_at=datetime.now(pytz.timezone('Asia/Kuala_Lumpur')).isoformat(),
+                updated_at=_now_iso(),
                 status="active"
             )
             
@@ -884,10 +889,16 @@ def setup_daily_cron():
     print("   Update Strategy: Replace existing grants, add new ones")
     print("\nCron job is running... Press Ctrl+C to stop.")
     
-    # Keep the script running
+    # Keep the script running, sleeping straight through to the next fire time
     while True:
+        idle_seconds = schedule.idle_seconds()
+        if idle_seconds is None:
+            # No jobs scheduled (e.g. cleared elsewhere); idle instead of spinning
+            time.sleep(CRON_IDLE_FALLBACK_SECONDS)
+            continue
+        if idle_seconds > 0:
+            time.sleep(idle_seconds)
         schedule.run_pending()
-        time.sleep(60)  # Check every minute
 
 
 if __name__ == "__main__":
@@ -1,15 +1,19 @@
+import asyncio
 import json
 import logging
 import os
-import re
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+import orjson
 import pytz
 from dotenv import load_dotenv
 from jamaibase import JamAI, types as t  # type: ignore[import-not-found]
-from openai import OpenAI, OpenAIError  # type: ignore[import-not-found]
+from openai import AsyncOpenAI, OpenAIError  # type: ignore[import-not-found]
+
+from ._llm_cache import DEFAULT_TTL_SECONDS, LLMResponseCache
 
 load_dotenv()
 
@@ -27,16 +31,139 @@ JAMAI_TOKEN = (
     or os.getenv("JAMAI_PAT")
 )
 TABLE_ID = os.getenv("JAMAI_SCRAP_RESULT_TABLE_ID", "scrap_result")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH") or str(
+    Path(__file__).resolve().parent / ".llm_cache.sqlite3"
+)
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS") or DEFAULT_TTL_SECONDS)
 DEFAULT_LIMIT = 20
+CLAIM_BATCH_SIZE = 8
+# Rows verified concurrently; each row fans out into several model calls, so keep this
+# well under the model's requests-per-minute budget.
+ROW_CONCURRENCY = int(os.getenv("AGENT2_ROW_CONCURRENCY") or 4)
+# Rows buffered before their column updates are flushed in one MultiRowUpdateRequest.
+UPDATE_BATCH_SIZE = 25
+LIST_PAGE_SIZE = 100
+# Only the columns the verifier reads; JamAI always includes the row ID.
+_LIST_COLUMNS = ["grant_scrap", "grant_final"]
+ClaimPath = Tuple[Union[str, int], ...]
+_FAILED_TO_VERIFY = "failed to verify"
+_JSON_DECODER = json.JSONDecoder()
+_REQUIRED_FILE_KEYS = frozenset({"name", "downloadUrl", "sourceUrl"})
+
+# Prompts keep every invariant instruction in the system message and only the per-call
+# data in the user message, so OpenAI's prefix cache can reuse the shared part.
+_VERIFY_SYSTEM_PROMPT = """
+You are a grant fact-checker for Malaysian government grant listings.
+
+You receive a list of claims. Each claim has an id, the URL it was scraped from, and the
+claim text. For every claim:
+- Verify it using ONLY information found at its URL. Do not rely on prior knowledge.
+- Set is_accurate to true when the page states the claim, false when the page contradicts
+  it, and "unknown" when the page is unreachable, ambiguous, or does not mention it.
+- Give a one-sentence explanation of the verdict.
+- Quote the supporting or contradicting text from the page in evidence. Use an empty list
+  when nothing on the page applies.
+- Return exactly one entry in "results" per claim, echoing its id unchanged.
+
+Example input:
+id: grantName
+URL: https://www.mdec.gov.my/grants/digital-content-grant
+Claim: Digital Content Grant
+
+id: period
+URL: https://www.mdec.gov.my/grants/digital-content-grant
+Claim: 1 January 2024 - 31 December 2024
+
+id: applicationProcess.requiredDocuments.0
+URL: https://www.mdec.gov.my/grants/digital-content-grant
+Claim: Document required: SSM company profile
+
+Example output:
+{"results": [
+  {"id": "grantName", "is_accurate": true,
+   "explanation": "The page title names the Digital Content Grant.",
+   "evidence": ["Digital Content Grant (DCG)"]},
+  {"id": "period", "is_accurate": false,
+   "explanation": "The page lists a 2025 application window instead.",
+   "evidence": ["Applications open 1 March 2025 and close 30 June 2025"]},
+  {"id": "applicationProcess.requiredDocuments.0", "is_accurate": "unknown",
+   "explanation": "The page does not list required documents.",
+   "evidence": []}
+]}
+"""
+# Enforced at the sampler, so the batch reply always parses and carries every field.
+_VERIFY_RESPONSE_FORMAT: Dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "claim_verdicts",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "additionalProperties": False,
+            "required": ["results"],
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "additionalProperties": False,
+                        "required": ["id", "is_accurate", "explanation", "evidence"],
+                        "properties": {
+                            "id": {"type": "string"},
+                            "is_accurate": {
+                                "anyOf": [
+                                    {"type": "boolean"},
+                                    {"type": "string", "enum": ["unknown"]},
+                                ]
+                            },
+                            "explanation": {"type": "string"},
+                            "evidence": {"type": "array", "items": {"type": "string"}},
+                        },
+                    },
+                }
+            },
+        },
+    },
+}
+
+_FINAL_PAYLOAD_SYSTEM_PROMPT = """
+You are a professional grant fact-checking AI. You receive:
+
+1. The original extracted grant detail JSON.
+2. The verification result JSON, holding one verdict (is_accurate, explanation, evidence)
+   per claim in the original.
+
+Instructions:
+- If all verification is_accurate values are true, return ONLY the original JSON object.
+- Otherwise, perform external verification and rebuild a corrected grant JSON with exactly
+  these fields:
+  {"grantName": {"value": "...", "sourceUrl": "..."},
+   "period": {"range": "...", "sourceUrl": "..."},
+   "grantDescription": {"text": "...", "sourceUrl": "..."},
+   "applicationProcess": {
+     "steps": {"description": "...", "sourceUrl": "..."},
+     "requiredDocuments": {"sourceUrl": "...",
+                           "files": [{"name": "...", "downloadUrl": "...", "sourceUrl": "..."}]}}}
+- If you are NOT fully confident after corrections, return exactly {"status": "failed"}.
+- Output a single JSON object. No markdown, no explanations.
+"""
+_FINAL_PAYLOAD_PROMPT = """
+Original grant JSON:
+{original_json}
+
+Verification result JSON:
+{verification_json}
+"""
 
 logger = logging.getLogger(__name__)
+_MYT = pytz.timezone("Asia/Kuala_Lumpur")
 
 
 def _now_iso() -> str:
-    return datetime.now(pytz.timezone("Asia/Kuala_Lumpur")).isoformat()
+    return datetime.now(_MYT).isoformat()
 
 
-@dataclass
+@dataclass(slots=True)
 class VerificationRunSummary:
     success: bool
     started_at: str
@@ -84,18 +211,22 @@ class GrantVerificationAgent:
         jamai_token: Optional[str],
         table_id: str = TABLE_ID,
         model_name: str = OPENAI_MODEL,
+        cache: Optional[LLMResponseCache] = None,
     ) -> None:
         self.openai_api_key = openai_api_key
+        self.cache = cache
         self.model_name = model_name or OPENAI_MODEL
         self.table_id = table_id or TABLE_ID
-        self.openai_client: Optional[OpenAI] = (
-            OpenAI(api_key=openai_api_key) if openai_api_key else None
-        )
-        self.jamai_client: Optional[JamAI] = (
-            JamAI(project_id=jamai_project_id, token=jamai_token)
-            if jamai_project_id and jamai_token
-            else None
-        )
+        self._jamai_project_id = jamai_project_id
+        self._jamai_token = jamai_token
+        self._jamai_client: Optional[JamAI] = None
+
+    @property
+    def jamai_client(self) -> Optional[JamAI]:
+        """JamAI SDK client, built on first use so constructing the agent stays cheap."""
+        if self._jamai_client is None and self._jamai_project_id and self._jamai_token:
+            self._jamai_client = JamAI(project_id=self._jamai_project_id, token=self._jamai_token)
+        return self._jamai_client
 
     def run(
         self,
@@ -104,7 +235,7 @@ class GrantVerificationAgent:
         limit: Optional[int] = None,
     ) -> VerificationRunSummary:
         started_at = _now_iso()
-        if not self.openai_client:
+        if not self.openai_api_key:
             return VerificationRunSummary(
                 success=False,
                 started_at=started_at,
@@ -127,47 +258,100 @@ class GrantVerificationAgent:
             finished_at=started_at,
         )
 
-        for raw_row in rows:
-            normalized = self._normalize_row(raw_row)
-            row_id = normalized.get("id")
-            if not row_id:
-                summary.skipped += 1
-                continue
-            summary.row_ids.append(row_id)
+        asyncio.run(self._verify_rows(rows, summary))
 
-            columns = normalized.get("columns", {})
-            grant_final = self._extract_column_value(columns, "grant_final")
-            if isinstance(grant_final, str) and grant_final.strip():
-                summary.skipped += 1
-                continue
+        summary.finished_at = _now_iso()
+        summary.success = summary.failed == 0
+        return summary
 
-            grant_scrap_raw = self._extract_column_value(columns, "grant_scrap")
-            grant_scrap = self._coerce_json(grant_scrap_raw)
-            if not isinstance(grant_scrap, dict):
-                summary.skipped += 1
-                summary.errors.append(f"{row_id}: grant_scrap missing or invalid")
-                continue
+    async def _verify_rows(
+        self,
+        rows: List[Dict[str, Any]],
+        summary: VerificationRunSummary,
+    ) -> None:
+        semaphore = asyncio.Semaphore(max(ROW_CONCURRENCY, 1))
+        pending: Dict[str, Dict[str, str]] = {}
+        async with AsyncOpenAI(api_key=self.openai_api_key) as async_client:
+            await asyncio.gather(
+                *(
+                    self._verify_row(async_client, semaphore, raw_row, pending, summary)
+                    for raw_row in rows
+                )
+            )
+        await self._flush_updates(pending, summary)
 
+    async def _verify_row(
+        self,
+        async_client: AsyncOpenAI,
+        semaphore: asyncio.Semaphore,
+        raw_row: Dict[str, Any],
+        pending: Dict[str, Dict[str, str]],
+        summary: VerificationRunSummary,
+    ) -> None:
+        normalized = self._normalize_row(raw_row)
+        row_id = normalized.get("id")
+        if not row_id:
+            summary.skipped += 1
+            return
+        summary.row_ids.append(row_id)
+
+        columns = normalized.get("columns", {})
+        grant_final = self._extract_column_value(columns, "grant_final")
+        if isinstance(grant_final, str) and grant_final.strip():
+            summary.skipped += 1
+            return
+
+        grant_scrap_raw = self._extract_column_value(columns, "grant_scrap")
+        grant_scrap = self._coerce_json(grant_scrap_raw)
+        if not isinstance(grant_scrap, dict):
+            summary.skipped += 1
+            summary.errors.append(f"{row_id}: grant_scrap missing or invalid")
+            return
+
+        updates: Dict[str, str] = {}
+        async with semaphore:
             try:
-                verification_result = self._process_input(grant_scrap)
-                verified_payload = self._normalize_json_string(verification_result)
-                self._update_columns(row_id, {"grant_verified": verified_payload})
-                summary.updated_verified += 1
+                verification_result = await self._process_input(async_client, grant_scrap)
+                verified_json = self._normalize_json_string(verification_result)
+                updates["grant_verified"] = verified_json
 
-                final_payload = self._produce_final_payload(
-                    row_id, grant_scrap, verification_result
+                updates["grant_final"] = await self._produce_final_payload(
+                    async_client, row_id, grant_scrap, verification_result, verified_json
                 )
-                self._update_columns(row_id, {"grant_final": final_payload})
-                summary.updated_final += 1
-                summary.processed += 1
             except Exception as exc:  # noqa: BLE001
                 logger.exception("Grant verification failed for row %s: %s", row_id, exc)
                 summary.failed += 1
                 summary.errors.append(f"{row_id}: {exc}")
 
-        summary.finished_at = _now_iso()
-        summary.success = summary.failed == 0
-        return summary
+        if not updates:
+            return
+        pending[row_id] = updates
+        if len(pending) >= UPDATE_BATCH_SIZE:
+            await self._flush_updates(pending, summary)
+
+    async def _flush_updates(
+        self,
+        pending: Dict[str, Dict[str, str]],
+        summary: VerificationRunSummary,
+    ) -> None:
+        """Write every buffered row in one JamAI call and record the outcome per row."""
+        if not pending:
+            return
+        batch = dict(pending)
+        pending.clear()
+        try:
+            await asyncio.to_thread(self._update_rows, batch)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Failed to write %s verified rows: %s", len(batch), exc)
+            summary.failed += len(batch)
+            summary.errors.extend(f"{row_id}: {exc}" for row_id in batch)
+            return
+
+        for columns in batch.values():
+            summary.updated_verified += 1
+            if "grant_final" in columns:
+                summary.updated_final += 1
+                summary.processed += 1
 
     def _list_target_rows(
         self,
@@ -195,19 +379,29 @@ class GrantVerificationAgent:
                     rows.append(self._row_to_dict(items[0]))
             return rows
 
-        try:
-            response = self.jamai_client.table.list_table_rows("action", self.table_id)
-        except Exception as exc:  # noqa: BLE001
-            logger.error("Failed to list action table rows: %s", exc)
-            return []
-
-        raw_rows = self._extract_items(response)
-
-        if not isinstance(raw_rows, list):
-            return []
+        raw_rows: List[Any] = []
+        offset = 0
+        while not limit or len(raw_rows) < limit:
+            page_size = min(LIST_PAGE_SIZE, limit - len(raw_rows)) if limit else LIST_PAGE_SIZE
+            try:
+                response = self.jamai_client.table.list_table_rows(
+                    "action",
+                    self.table_id,
+                    offset=offset,
+                    limit=page_size,
+                    columns=_LIST_COLUMNS,
+                )
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Failed to list action table rows: %s", exc)
+                break
 
-        if limit:
-            raw_rows = raw_rows[:limit]
+            page = self._extract_items(response)
+            if not isinstance(page, list):
+                break
+            raw_rows.extend(page)
+            if len(page) < page_size:
+                break
+            offset += len(page)
 
         return [self._row_to_dict(row) for row in raw_rows]
 
@@ -269,10 +463,15 @@ class GrantVerificationAgent:
             stripped = value.strip()
             if not stripped:
                 return None
-            return json.loads(stripped)
+            try:
+                parsed, _ = _JSON_DECODER.raw_decode(stripped)
+            except json.JSONDecodeError:
+                return None
+            return parsed if isinstance(parsed, dict) else None
         return value
 
-    def _verify_claim(self, claim: Optional[str], url: Optional[str]) -> Dict[str, Any]:
+    def _precheck_claim(self, claim: Optional[str], url: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return a local verdict for claims that cannot be sent to the model."""
         if not claim:
             return {
                 "is_accurate": "unknown",
@@ -285,201 +484,268 @@ class GrantVerificationAgent:
                 "explanation": "missing source URL",
                 "evidence": [],
             }
+        return None
 
-        prompt = f"""
-You are a grant fact-checker. Verify the following grant detail using ONLY information from the URL.
-
-URL: {url}
-
-Claim to verify:
-{claim}
-
-Return ONLY a JSON object with these exact fields:
- - "is_accurate": true/false/unknown,
- - "explanation": "text",
- - "evidence": ["list", "of", "quotes"]
-
-Remember:
-- Output ONLY valid JSON
-- Never add commentary
-- Never add markdown
-- Never add backticks
-"""
-        response_text = self._call_openai_chat(
-            system_prompt=(
-                "You are a grant fact-checking AI. Output strictly valid JSON with "
-                "the keys is_accurate, explanation, and evidence."
-            ),
-            user_prompt=prompt,
+    async def _verify_claims_batch(
+        self,
+        async_client: AsyncOpenAI,
+        batch: List[Tuple[str, str, str]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """Verify up to CLAIM_BATCH_SIZE (id, claim, url) triples in a single model call."""
+        claims_block = "\n\n".join(
+            f"id: {claim_id}\nURL: {url}\nClaim: {claim}" for claim_id, claim, url in batch
+        )
+        response_text = await self._call_openai_chat(
+            async_client,
+            system_prompt=_VERIFY_SYSTEM_PROMPT,
+            user_prompt=claims_block,
+            response_format=_VERIFY_RESPONSE_FORMAT,
+            prompt_cache_key="agent2-verify",
         )
         try:
-            return json.loads(response_text)
+            parsed = orjson.loads(response_text)
         except json.JSONDecodeError as exc:
             logger.warning("Failed to parse verification JSON: %s", exc)
-            return {
-                "is_accurate": "unknown",
-                "explanation": "model returned invalid JSON",
-                "evidence": [],
-            }
+            parsed = {}
+
+        items = parsed.get("results") if isinstance(parsed, dict) else None
+        raw_results: Dict[str, Dict[str, Any]] = {}
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, dict) and "id" in item:
+                raw_results[str(item.pop("id"))] = item
+
+        verdicts: Dict[str, Dict[str, Any]] = {}
+        for claim_id, _, _ in batch:
+            verdict = raw_results.get(claim_id)
+            if isinstance(verdict, dict):
+                verdicts[claim_id] = verdict
+            else:
+                verdicts[claim_id] = {
+                    "is_accurate": "unknown",
+                    "explanation": "model returned invalid JSON",
+                    "evidence": [],
+                }
+        return verdicts
+
+    async def _process_input(
+        self,
+        async_client: AsyncOpenAI,
+        data: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Verify every claim in the grant in batched model calls and rebuild the nested result."""
+        claims = self._collect_claims(data)
+        verdicts: Dict[str, Dict[str, Any]] = {}
+        pending: List[Tuple[str, str, str]] = []
+        cache_keys: Dict[str, str] = {}
+        for path, claim, url in claims:
+            claim_id = ".".join(str(key) for key in path)
+            local_verdict = self._precheck_claim(claim, url)
+            if local_verdict is not None:
+                verdicts[claim_id] = local_verdict
+                continue
+            if self.cache is not None:
+                cache_key = self.cache.make_key(
+                    self.model_name, _VERIFY_SYSTEM_PROMPT, claim or "", url or ""
+                )
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    verdicts[claim_id] = orjson.loads(cached)
+                    continue
+                cache_keys[claim_id] = cache_key
+            pending.append((claim_id, claim, url))  # type: ignore[arg-type]
+
+        batches = [
+            pending[start : start + CLAIM_BATCH_SIZE]
+            for start in range(0, len(pending), CLAIM_BATCH_SIZE)
+        ]
+        for batch_verdicts in await asyncio.gather(
+            *(self._verify_claims_batch(async_client, batch) for batch in batches)
+        ):
+            verdicts.update(batch_verdicts)
+
+        if self.cache is not None:
+            for claim_id, cache_key in cache_keys.items():
+                verdict = verdicts[claim_id]
+                if verdict.get("explanation") != "model returned invalid JSON":
+                    self.cache.set(cache_key, orjson.dumps(verdict).decode())
 
-    def _process_input(self, data: Dict[str, Any]) -> Dict[str, Any]:
         results: Dict[str, Any] = {}
+        for path, _, _ in claims:
+            verdict = verdicts[".".join(str(key) for key in path)]
+            node: Any = results
+            for key, next_key in zip(path, path[1:]):
+                node = node.setdefault(key, [] if isinstance(next_key, int) else {})
+            if isinstance(path[-1], int):
+                node.append(verdict)
+            else:
+                node[path[-1]] = verdict
+        return results
+
+    def _collect_claims(
+        self, data: Dict[str, Any]
+    ) -> List[Tuple[ClaimPath, Optional[str], Optional[str]]]:
+        """Flatten the grant into (result path, claim, source URL) triples."""
+        claims: List[Tuple[ClaimPath, Optional[str], Optional[str]]] = []
 
         grant_name = data.get("grantName") or {}
         if grant_name:
-            results["grantName"] = self._verify_claim(
-                grant_name.get("value"), grant_name.get("sourceUrl")
-            )
+            claims.append((("grantName",), grant_name.get("value"), grant_name.get("sourceUrl")))
 
         period = data.get("period") or {}
         if period:
-            results["period"] = self._verify_claim(
-                period.get("range"), period.get("sourceUrl")
-            )
+            claims.append((("period",), period.get("range"), period.get("sourceUrl")))
 
         description = data.get("grantDescription") or {}
         if description:
-            results["grantDescription"] = self._verify_claim(
-                description.get("text"), description.get("sourceUrl")
+            claims.append(
+                (("grantDescription",), description.get("text"), description.get("sourceUrl"))
             )
 
         application_process = data.get("applicationProcess") or {}
         if application_process:
-            app_result: Dict[str, Any] = {}
             steps = application_process.get("steps") or {}
             if steps:
-                app_result["steps"] = self._verify_claim(
-                    steps.get("description"), steps.get("sourceUrl")
+                claims.append(
+                    (
+                        ("applicationProcess", "steps"),
+                        steps.get("description"),
+                        steps.get("sourceUrl"),
+                    )
                 )
 
             required_documents = application_process.get("requiredDocuments") or {}
-            doc_results: List[Dict[str, Any]] = []
-            for file_info in required_documents.get("files", []) or []:
-                doc_results.append(
-                    self._verify_claim(
+            for index, file_info in enumerate(required_documents.get("files", []) or []):
+                claims.append(
+                    (
+                        ("applicationProcess", "requiredDocuments", index),
                         f"Document required: {file_info.get('name')}",
                         file_info.get("sourceUrl"),
                     )
                 )
-            if doc_results:
-                app_result["requiredDocuments"] = doc_results
-
-            if app_result:
-                results["applicationProcess"] = app_result
 
         required_documents = data.get("requiredDocuments")
-        if required_documents and "requiredDocuments" not in results:
-            doc_results = []
-            for file_info in required_documents.get("files", []) or []:
-                doc_results.append(
-                    self._verify_claim(
+        if required_documents:
+            for index, file_info in enumerate(required_documents.get("files", []) or []):
+                claims.append(
+                    (
+                        ("requiredDocuments", index),
                         f"Document required: {file_info.get('name')}",
                         file_info.get("sourceUrl"),
                     )
                 )
-            if doc_results:
-                results["requiredDocuments"] = doc_results
 
-        return results
+        return claims
 
     def _normalize_json_string(self, payload: Any) -> str:
-        return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+        return orjson.dumps(payload).decode()
 
-    def _update_columns(self, row_id: str, data: Dict[str, str]) -> None:
+    def _update_rows(self, data: Dict[str, Dict[str, str]]) -> None:
         if not self.jamai_client:
             raise RuntimeError("JamAI client not initialized")
         self.jamai_client.table.update_table_rows(
             "action",
             t.MultiRowUpdateRequest(
                 table_id=self.table_id,
-                data={row_id: data},
+                data=data,
             ),
         )
 
-    def _produce_final_payload(
+    async def _produce_final_payload(
         self,
+        async_client: AsyncOpenAI,
         row_id: str,
         original: Dict[str, Any],
         verification_result: Dict[str, Any],
+        verification_json: str,
     ) -> str:
-        prompt = f"""
-You are a professional grant fact-checking AI. You receive:
-
-1. The original extracted grant detail JSON: {json.dumps(original, ensure_ascii=False)}
-2. The verification result JSON: {json.dumps(verification_result, ensure_ascii=False)}
-
-Instructions:
-- If all verify_json.is_accurate values are true, return ONLY the original JSON object.
-- Otherwise, perform external verification, rebuild a corrected grant JSON with the exact fields:
-  grantName, period, grantDescription, applicationProcess (steps + requiredDocuments).
-- If you are NOT fully confident after corrections, return the exact string failed to verify.
-- Output must be either a valid JSON object or failed to verify. No markdown, no explanations.
-"""
-        response_text = self._call_openai_chat(
-            system_prompt=(
-                "You are a grant fact-checking AI. Return either a valid JSON object "
-                "matching the required schema or the string failed to verify."
-            ),
+        """Return the grant_final value; `verification_json` is `verification_result` pre-encoded."""
+        original_json = self._normalize_json_string(original)
+        if self._all_accurate(verification_result) and self._is_valid_final_payload(original):
+            return original_json
+
+        prompt = _FINAL_PAYLOAD_PROMPT.format_map(
+            {
+                "original_json": original_json,
+                "verification_json": verification_json,
+            }
+        )
+        cache_key: Optional[str] = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.model_name, _FINAL_PAYLOAD_SYSTEM_PROMPT, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        response_text = await self._call_openai_chat(
+            async_client,
+            system_prompt=_FINAL_PAYLOAD_SYSTEM_PROMPT,
             user_prompt=prompt,
+            response_format={"type": "json_object"},
+            prompt_cache_key="agent2-final",
         )
-        parsed = self._parse_model_output(response_text)
-        if isinstance(parsed, dict) and self._is_valid_final_payload(parsed):
-            return self._normalize_json_string(parsed)
-
-        if isinstance(parsed, str):
-            if parsed.strip().lower() == "failed to verify":
-                return "failed to verify"
+        try:
+            parsed = orjson.loads(response_text)
+        except json.JSONDecodeError:
+            parsed = None
 
-        logger.warning("Grant final output invalid for row %s, defaulting to failure", row_id)
-        return "failed to verify"
+        if isinstance(parsed, dict) and self._is_valid_final_payload(parsed):
+            final_payload = self._normalize_json_string(parsed)
+            if cache_key is not None and self.cache is not None:
+                self.cache.set(cache_key, final_payload)
+            return final_payload
+
+        if not (isinstance(parsed, dict) and parsed.get("status") == "failed"):
+            logger.warning("Grant final output invalid for row %s, defaulting to failure", row_id)
+        return _FAILED_TO_VERIFY
+
+    def _all_accurate(self, verification_result: Dict[str, Any]) -> bool:
+        """Return True only when every verified claim came back with is_accurate == true."""
+        verdicts: List[Any] = []
+        for key in ("grantName", "period", "grantDescription"):
+            if key in verification_result:
+                verdicts.append(verification_result[key])
+
+        app_result = verification_result.get("applicationProcess") or {}
+        if "steps" in app_result:
+            verdicts.append(app_result["steps"])
+        verdicts.extend(app_result.get("requiredDocuments") or [])
+        verdicts.extend(verification_result.get("requiredDocuments") or [])
+
+        if not verdicts:
+            return False
+        return all(
+            isinstance(verdict, dict) and verdict.get("is_accurate") is True
+            for verdict in verdicts
+        )
 
-    def _call_openai_chat(self, system_prompt: str, user_prompt: str) -> str:
-        if not self.openai_client:
-            raise RuntimeError("OpenAI client not initialized")
+    async def _call_openai_chat(
+        self,
+        async_client: AsyncOpenAI,
+        system_prompt: str,
+        user_prompt: str,
+        response_format: Optional[Dict[str, Any]] = None,
+        prompt_cache_key: Optional[str] = None,
+    ) -> str:
+        request: Dict[str, Any] = {
+            "model": self.model_name,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+        }
+        if response_format is not None:
+            request["response_format"] = response_format
+        if prompt_cache_key is not None:
+            # Routes calls sharing a system prompt to the same cache shard.
+            request["prompt_cache_key"] = prompt_cache_key
         try:
-            response = self.openai_client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-            )
+            response = await async_client.chat.completions.create(**request)
         except OpenAIError as exc:  # noqa: PERF203
             raise RuntimeError(f"OpenAI request failed: {exc}") from exc
 
         content = response.choices[0].message.content or ""
         return content.strip()
 
-    def _parse_model_output(self, raw_text: Optional[str]) -> Any:
-        if raw_text is None:
-            return "failed to verify"
-
-        text = raw_text.strip()
-        if text.lower() == "failed to verify":
-            return "failed to verify"
-
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
-
-        brace_match = re.search(r"(\{(?:[^{}]|(?1))*\})", text)
-        if brace_match:
-            candidate = brace_match.group(1)
-            try:
-                return json.loads(candidate)
-            except json.JSONDecodeError:
-                candidate_clean = (
-                    candidate.replace("“", '"').replace("”", '"').replace("’", "'")
-                )
-                candidate_clean = re.sub(r",\s*(\}|])", r"\1", candidate_clean)
-                try:
-                    return json.loads(candidate_clean)
-                except json.JSONDecodeError:
-                    pass
-
-        return text
-
     def _is_valid_final_payload(self, grant: Dict[str, Any]) -> bool:
         try:
             required_structure = {
@@ -511,7 +777,7 @@ Instructions:
                 return False
             if "files" in req_docs and isinstance(req_docs["files"], list):
                 for file_item in req_docs["files"]:
-                    if not all(key in file_item for key in ["name", "downloadUrl", "sourceUrl"]):
+                    if not _REQUIRED_FILE_KEYS.issubset(file_item):
                         return False
             return True
         except Exception:
@@ -528,8 +794,13 @@ def run_grant_verifier(
         jamai_project_id=JAMAI_PROJECT_ID,
         jamai_token=JAMAI_TOKEN,
         table_id=TABLE_ID,
+        cache=LLMResponseCache(LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL_SECONDS),
     )
-    return agent.run(row_ids=row_ids, limit=limit)
+    try:
+        return agent.run(row_ids=row_ids, limit=limit)
+    finally:
+        if agent.cache is not None:
+            agent.cache.close()
 
 
 if __name__ == "__main__":
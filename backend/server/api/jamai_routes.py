@@ -1,6 +1,12 @@
+from typing import Any, AsyncIterator, Dict
+
+import orjson
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from ..services.chat_table_service import chat_table_service
+from ..services.chat_table_service import REDIRECT_TOKEN, chat_table_service
 from ..services.grant_manager import grant_agent
 from ..core.deps import get_current_user
 from ..models.auth import FirebaseUser
@@ -8,79 +14,90 @@ from ..models.auth import FirebaseUser
 router = APIRouter(prefix="/jamai", tags=["jamai"])
 
 @router.post("/session")
-def create_chat_session(current_user: FirebaseUser = Depends(get_current_user)):
+async def create_chat_session(current_user: FirebaseUser = Depends(get_current_user)):
     try:
-        result = chat_table_service.create_chat_table(current_user.user_id)
+        result = await chat_table_service.create_chat_table_async(current_user.user_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Simple in-memory session management
-sessions = {}
+# Simple in-memory session management; entries expire after an hour without activity
+sessions = TTLCache(maxsize=10_000, ttl=3600)
 
 @router.post("/reset")
-def reset_chat_session(current_user: FirebaseUser = Depends(get_current_user)):
+async def reset_chat_session(current_user: FirebaseUser = Depends(get_current_user)):
     """
     Explicitly resets the chat session for the user.
     Call this on Logout or when the user wants to start over.
     """
-    user_id = current_user.user_id
-    if user_id in sessions:
-        del sessions[user_id]
-        
+    # Async so the cache is only touched on the event loop, like the /message handlers;
+    # pop avoids a KeyError if the entry expires between a check and a delete.
+    sessions.pop(current_user.user_id, None)
+
     return {"status": "success", "message": "Session reset successfully."}
 
 class ChatRequest(BaseModel):
     message: str
 
+
+def _get_session(user_id: str) -> Dict[str, Any]:
+    # Get or create session. TTLCache times entries from insertion, and sessions are
+    # mutated in place, so re-insert on every access to make expiry idle-based.
+    session = sessions.get(user_id)
+    if session is None:
+        session = {"buffer": "", "status": "IDLE", "user_id": user_id}
+    sessions[user_id] = session
+    return session
+
+
+async def _run_grant_search(session: Dict[str, Any], message: str) -> str:
+    # GrantAgent posts through its own blocking httpx client, so keep it off the event loop
+    result = await run_in_threadpool(grant_agent.process_input, session, message)
+
+    # Check if done
+    if result.get("status") == "DONE":
+        session["status"] = "IDLE" # Reset to IDLE after verdict
+        session["buffer"] = ""
+    return result.get("reply", "")
+
+
+# Characters of streamed text held back in case they begin the redirect token
+_TOKEN_TAIL = len(REDIRECT_TOKEN) - 1
+
+
+def _sse(payload: Dict[str, Any]) -> bytes:
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
 @router.post("/message")
-def send_chat_message(request: ChatRequest, current_user: FirebaseUser = Depends(get_current_user)):
+async def send_chat_message(request: ChatRequest, current_user: FirebaseUser = Depends(get_current_user)):
     user_id = current_user.user_id
-    
-    # Get or create session
-    if user_id not in sessions:
-        sessions[user_id] = {"buffer": "", "status": "IDLE", "user_id": user_id}
-    
-    session = sessions[user_id]
+    session = _get_session(user_id)
     
     try:
         # LAZY ROUTER LOGIC
         
         # Case 1: Already in Active Search Mode
         if session["status"] == "ACTIVE_SEARCH":
-            result = grant_agent.process_input(session, request.message)
-            
-            # Check if done
-            if result.get("status") == "DONE":
-                session["status"] = "IDLE" # Reset to IDLE after verdict
-                session["buffer"] = ""
-                
             return {
                 "status": "reply", # Frontend expects "reply" to show message
-                "message": [result.get("reply", "")]
+                "message": [await _run_grant_search(session, request.message)]
             }
 
         # Case 2: IDLE Mode (Normal Chat)
         else:
-            # Call the Chat Table (General Agent)
-            # We use send_message directly to check for the token ourselves
-            chat_response = chat_table_service.send_message(user_id, request.message)
+            # Call the Chat Table (General Agent); returns None as soon as the reply
+            # turns out to be the redirect token, without waiting for the rest
+            chat_response = await chat_table_service.send_message_or_redirect(user_id, request.message)
             
-            if "<<REDIRECT_TO_SEARCH>>" in chat_response:
+            if chat_response is None:
                 # Switch to Active Search
                 session["status"] = "ACTIVE_SEARCH"
                 
                 # Immediately process the input that triggered the redirect
-                result = grant_agent.process_input(session, request.message)
-                
-                # Check if done (unlikely on first turn, but possible)
-                if result.get("status") == "DONE":
-                    session["status"] = "IDLE"
-                    session["buffer"] = ""
-                
                 return {
                     "status": "reply",
-                    "message": [result.get("reply", "")]
+                    "message": [await _run_grant_search(session, request.message)]
                 }
             else:
                 # Normal conversation
@@ -90,4 +107,50 @@ def send_chat_message(request: ChatRequest, current_user: FirebaseUser = Depends
                 }
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _stream_events(session: Dict[str, Any], user_id: str, message: str) -> AsyncIterator[bytes]:
+    try:
+        if session["status"] != "ACTIVE_SEARCH":
+            # Forward text as it arrives, holding back only a tail that could still be the
+            # start of the redirect token; the token counts wherever it appears, as in /message.
+            held = ""
+            redirect = False
+            chunks = chat_table_service.stream_message_async(user_id, message)
+            try:
+                async for delta in chunks:
+                    held += delta
+                    if REDIRECT_TOKEN in held:
+                        redirect = True
+                        break
+                    cut = len(held) - _TOKEN_TAIL
+                    if cut > 0:
+                        yield _sse({"delta": held[:cut]})
+                        held = held[cut:]
+            finally:
+                await chunks.aclose()
+
+            if not redirect:
+                if held:
+                    yield _sse({"delta": held})
+                yield b"data: [DONE]\n\n"
+                return
+            session["status"] = "ACTIVE_SEARCH"
+
+        yield _sse({"delta": await _run_grant_search(session, message)})
+        yield b"data: [DONE]\n\n"
+    except Exception as e:
+        yield _sse({"error": str(e)})
+
+
+@router.post("/message/stream")
+async def stream_chat_message(request: ChatRequest, current_user: FirebaseUser = Depends(get_current_user)):
+    """
+    Server-sent events variant of /message. Normal chat replies are forwarded as
+    {"delta": ...} events while JamAI generates them; grant search replies arrive as a
+    single event. The stream ends with [DONE], or an {"error": ...} event on failure.
+    """
+    user_id = current_user.user_id
+    session = _get_session(user_id)
+    return StreamingResponse(_stream_events(session, user_id, request.message), media_type="text/event-stream")
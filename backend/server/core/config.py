@@ -1,18 +1,25 @@
 import os
-from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from types import MappingProxyType
+from typing import List, Optional, Tuple
 
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
-load_dotenv(BASE_DIR / ".env")
+# Each worker process parses .env at most once, and never overrides variables the
+# deployment already set.
+if not os.getenv("MYGERAN_ENV_LOADED"):
+    load_dotenv(BASE_DIR / ".env", override=False)
+    os.environ["MYGERAN_ENV_LOADED"] = "1"
+
+# Read-only snapshot so settings lookups are plain dict reads, not os.environ calls.
+_ENV = MappingProxyType(dict(os.environ))
 
 
 def _split_env_list(name: str, fallback: str | None = None) -> List[str]:
-    raw_value = os.getenv(name)
+    raw_value = _ENV.get(name)
     if raw_value:
         return [item.strip() for item in raw_value.split(",") if item.strip()]
     if fallback:
@@ -29,7 +36,7 @@ def _first_env(*keys: str, default: Optional[str] = None) -> Optional[str]:
     for key in keys:
         if not key:
             continue
-        value = os.getenv(key)
+        value = _ENV.get(key)
         if value:
             return value
     return default
@@ -39,40 +46,53 @@ class Settings:
     """Central application configuration loaded from environment variables."""
 
     def __init__(self) -> None:
-        self.app_name: str = os.getenv("APP_NAME", "MYGeranHub API")
-        self.environment: str = os.getenv("APP_ENV", "local")
-        self.firebase_project_id: str | None = os.getenv("FIREBASE_PROJECT_ID")
-        self.firebase_credentials_path: str | None = os.getenv("FIREBASE_CREDENTIALS_PATH")
-        self.firebase_credentials_json: str | None = os.getenv("FIREBASE_CREDENTIALS_JSON")
-        self.jamai_base_url: str | None = os.getenv("JAMAI_BASE_URL")
+        self.app_name: str = _ENV.get("APP_NAME", "MYGeranHub API")
+        self.environment: str = _ENV.get("APP_ENV", "local")
+        self.log_level: str = _ENV.get("LOG_LEVEL", "INFO")
+        self.firebase_project_id: str | None = _ENV.get("FIREBASE_PROJECT_ID")
+        self.firebase_credentials_path: str | None = _ENV.get("FIREBASE_CREDENTIALS_PATH")
+        self.firebase_credentials_json: str | None = _ENV.get("FIREBASE_CREDENTIALS_JSON")
+        self.jamai_base_url: str | None = _ENV.get("JAMAI_BASE_URL")
         self.jamai_project_id: str | None = _first_env("JAMAI_PROJECT_ID", "JAMAIBASE_PROJECT_ID")
         self.jamai_api_key: str | None = _first_env("JAMAI_API_KEY", "JAMAIBASE_API_KEY", "JAMAI_PAT")
-        self.jamai_scrap_result_table_id: str | None = os.getenv("JAMAI_SCRAP_RESULT_TABLE_ID")
-        self.jamai_grants_table_id: str | None = os.getenv("JAMAI_GRANTS_TABLE_ID")
-        self.jamai_knowledge_sync_status_column: str = os.getenv(
+        self.jamai_scrap_result_table_id: str | None = _ENV.get("JAMAI_SCRAP_RESULT_TABLE_ID")
+        self.jamai_grants_table_id: str | None = _ENV.get("JAMAI_GRANTS_TABLE_ID")
+        self.jamai_knowledge_sync_status_column: str = _ENV.get(
             "JAMAI_KNOWLEDGE_SYNC_STATUS_COL", "knowledge_sync_status"
         )
-        self.jamai_knowledge_embedding_model: str | None = os.getenv("JAMAI_KNOWLEDGE_EMBEDDING_MODEL")
+        self.jamai_knowledge_embedding_model: str | None = _ENV.get("JAMAI_KNOWLEDGE_EMBEDDING_MODEL")
         self.jamai_sdk_project_id: str | None = _first_env(
             "JAMAI_SDK_PROJECT_ID", "JAMAI_PROJECT_ID", "JAMAIBASE_PROJECT_ID"
         )
         self.jamai_sdk_token: str | None = _first_env(
             "JAMAI_SDK_TOKEN", "JAMAI_API_KEY", "JAMAIBASE_API_KEY", "JAMAI_PAT"
         )
-        self.gemini_api_key: str | None = os.getenv("GEMINI_API_KEY")
-        self.gemini_model_name: str = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
-        self.openai_api_key: str | None = os.getenv("OPENAI_API_KEY")
-        self.openai_model_name: str = os.getenv("OPENAI_MODEL", "o4-mini")
+        self.gemini_api_key: str | None = _ENV.get("GEMINI_API_KEY")
+        self.gemini_model_name: str = _ENV.get("GEMINI_MODEL", "gemini-2.0-flash")
+        self.openai_api_key: str | None = _ENV.get("OPENAI_API_KEY")
+        self.openai_model_name: str = _ENV.get("OPENAI_MODEL", "o4-mini")
+        # Prefetch the general chat reply for question-like grant-search inputs while the
+        # guardrail runs; a non-interruption still leaves that turn in the user's chat table.
+        self.speculative_interruption_chat: bool = _ENV.get(
+            "SPECULATIVE_INTERRUPTION_CHAT", ""
+        ).lower() in {"1", "true", "yes"}
+        # Start the Judge alongside the Detective on long profiles; when the Detective says
+        # INCOMPLETE the extra Final_Grant call is wasted and leaves a row in that table.
+        self.speculative_judge: bool = _ENV.get("SPECULATIVE_JUDGE", "").lower() in {"1", "true", "yes"}
+        # The action table returns each cell as {"value": ...} at the top level of the row;
+        # lets the pipeline worker read it directly before trying the other row shapes.
+        self.jamai_flat_rows: bool = _ENV.get("JAMAI_FLAT_ROWS", "").lower() in {"1", "true", "yes"}
         self.frontend_origins: List[str] = _split_env_list("FRONTEND_ORIGINS", "http://localhost:5173")
+        self._cors_origins: Tuple[str, ...] = tuple(self.frontend_origins) or ("*",)
 
     @property
-    def cors_origins(self) -> List[str]:
-        return self.frontend_origins or ["*"]
+    def cors_origins(self) -> Tuple[str, ...]:
+        return self._cors_origins
 
 
-@lru_cache
-def get_settings() -> Settings:
-    return Settings()
+settings = Settings()
 
 
-settings = get_settings()
\ No newline at end of file
+def get_settings() -> Settings:
+    """Return the process-wide settings; usable as a FastAPI dependency."""
+    return settings
\ No newline at end of file
@@ -1,24 +1,34 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict
+import logging
+from typing import TYPE_CHECKING, Any, Dict
 
-import firebase_admin
+import orjson
 from fastapi import HTTPException, status
-from firebase_admin import auth as firebase_auth
-from firebase_admin import credentials
 
 from ..models.auth import FirebaseUser
 from .config import settings
 
+if TYPE_CHECKING:
+    import firebase_admin
+    from firebase_admin import auth as firebase_auth_module
+    from firebase_admin import credentials
+
+logger = logging.getLogger(__name__)
+
 firebase_app = None
+# firebase_admin.auth, bound once the app is initialised.
+_firebase_auth: "firebase_auth_module | None" = None
 
 
 def _build_credentials() -> credentials.Certificate:
+    # firebase_admin is heavy to import, so it is only loaded once auth is first needed.
+    from firebase_admin import credentials
+
     if settings.firebase_credentials_json:
         try:
-            payload: Dict[str, Any] = json.loads(settings.firebase_credentials_json)
-        except json.JSONDecodeError as exc:  # pragma: no cover - defensive branch
+            payload: Dict[str, Any] = orjson.loads(settings.firebase_credentials_json)
+        except orjson.JSONDecodeError as exc:  # pragma: no cover - defensive branch
             raise RuntimeError("FIREBASE_CREDENTIALS_JSON is not valid JSON") from exc
         return credentials.Certificate(payload)
 
@@ -29,24 +39,38 @@ def _build_credentials() -> credentials.Certificate:
 
 
 def _ensure_firebase_app() -> firebase_admin.App:
-    global firebase_app
+    global firebase_app, _firebase_auth
     if firebase_app:
         return firebase_app
 
+    import firebase_admin
+    from firebase_admin import auth as firebase_auth
+
     cred = _build_credentials()
     firebase_app = firebase_admin.initialize_app(
         credential=cred,
         options={"projectId": settings.firebase_project_id} if settings.firebase_project_id else None,
     )
+    _firebase_auth = firebase_auth
     return firebase_app
 
 
-def verify_id_token(token: str) -> FirebaseUser:
+def init_firebase() -> None:
+    """Initialise Firebase at startup so the first authenticated request doesn't pay for it."""
     try:
         _ensure_firebase_app()
-        decoded = firebase_auth.verify_id_token(token, clock_skew_seconds=10)
+    except Exception as exc:  # noqa: BLE001
+        # Keep serving; verify_id_token retries and reports 401s until credentials are fixed.
+        logger.warning("Firebase initialisation deferred: %s", exc)
+
+
+def verify_id_token(token: str) -> FirebaseUser:
+    try:
+        if _firebase_auth is None:
+            _ensure_firebase_app()
+        decoded = _firebase_auth.verify_id_token(token, clock_skew_seconds=10)
     except Exception as exc:
-        print(f"Firebase token verification failed: {exc}")
+        logger.warning("Firebase token verification failed: %s", exc)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired Firebase ID token.",
@@ -1,6 +1,11 @@
+import logging
+
 import httpx
+import orjson
 from typing import List, Dict, Any, Sequence
 
+logger = logging.getLogger(__name__)
+
 class JamAIClient:
     def __init__(self, base_url: str, project_id: str, api_key: str) -> None:
         self.base_url = base_url.rstrip("/")
@@ -10,12 +15,22 @@ class JamAIClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
 
-    def generate_reply(self, messages: List[Dict[str, str]], model: str = "openai/gpt-4o-mini") -> str:
+    async def generate_reply(self, messages: List[Dict[str, str]], model: str = "openai/gpt-4o-mini") -> str:
         """
         Generates a reply using the JamAI Base API (OpenAI-compatible chat completions).
         """
-        url = f"{self.base_url}/projects/{self.project_id}/chat/completions"
+        url = f"/projects/{self.project_id}/chat/completions"
         
         payload = {
             "model": model,
@@ -25,14 +40,13 @@ class JamAIClient:
         }
 
         try:
-            with httpx.Client() as client:
-                response = client.post(url, headers=self.headers, json=payload, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                # Assuming OpenAI-compatible response structure
-                return data["choices"][0]["message"]["content"]
+            response = await self._client.post(url, content=orjson.dumps(payload))
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            # Assuming OpenAI-compatible response structure
+            return data["choices"][0]["message"]["content"]
         except Exception as e:
-            print(f"Error calling JamAI API: {e}")
+            logger.error("Error calling JamAI API: %s", e)
             return f"Error: {str(e)}"
 
 
@@ -0,0 +1,74 @@
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(level: str = "INFO") -> None:
+    """
+    Route root logging through a QueueHandler so request handlers only enqueue
+    records; a background QueueListener does the actual stream writes.
+    Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    )
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the background listener."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that renders the asctime seconds part once per wall-clock second."""
+
+    def __init__(self, fmt: Optional[str] = None) -> None:
+        super().__init__(fmt)
+        self._cached_second = -1
+        self._cached_stamp = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_stamp = time.strftime(self.default_time_format, self.converter(record.created))
+            self._cached_second = second
+        return self.default_msec_format % (self._cached_stamp, record.msecs)
+
+
+def configure_worker_logging(verbose: bool = False) -> None:
+    """
+    Attach a stdout handler for the background workers. Safe to call more than
+    once; later calls only adjust the level.
+    """
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG if verbose else logging.INFO)
+    if root.handlers:
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(CachedTimeFormatter("%(asctime)s - %(levelname)s - %(message)s"))
+    root.addHandler(handler)
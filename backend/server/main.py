@@ -3,6 +3,11 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from .api import auth, jamai_routes, grant_sync
 from .core import settings
+from .core.firebase import init_firebase
+from .core.log_config import configure_logging, stop_logging
+from .services.chat_table_service import chat_table_service
+
+configure_logging(settings.log_level)
 
 app = FastAPI(title=settings.app_name)
 
@@ -22,3 +27,15 @@ app.include_router(grant_sync.router)
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+
+@app.on_event("startup")
+def init_auth():
+    init_firebase()
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    chat_table_service.close()
+    await chat_table_service.aclose()
+    stop_logging()
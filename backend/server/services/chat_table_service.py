@@ -1,18 +1,114 @@
+import logging
+import threading
+
 import httpx
-from typing import Any, Dict, Tuple
+import orjson
+from typing import Any, AsyncIterator, Dict, Optional
 
 from ..core.config import settings
 
+logger = logging.getLogger(__name__)
+
+REDIRECT_TOKEN = "<<REDIRECT_TO_SEARCH>>"
+_AGENT_ID = "User_Chat_Agent"
+# JamAI endpoints, relative to the clients' base_url.
+_CHAT_TABLE_PATH = "/gen_tables/chat"
+_CHAT_DUPLICATE_PATH = "/gen_tables/chat/duplicate"
+_CHAT_ROWS_ADD_PATH = "/gen_tables/chat/rows/add"
+_ACTION_ROWS_ADD_PATH = "/gen_tables/action/rows/add"
+_POOL_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0)
+# The parent agent table definition never changes, so it is encoded once at import.
+_AGENT_PAYLOAD_BYTES = orjson.dumps({
+    "id": _AGENT_ID,
+    "cols": [
+        {"id": "User", "dtype": "str"},
+        {
+            "id": "AI",
+            "dtype": "str",
+            "gen_config": {
+                "model": "gemini-1.5-flash",
+                "system_prompt": (
+                    "You are a Routing Logic Engine for the MYGeranHub application.\n\n"
+                    "**YOUR SOLE FUNCTION:**\n"
+                    "Classify the user input and route it accordingly.\n\n"
+                    "---\n\n"
+                    "### RULE 1: THE TRAP (Priority High)\n"
+                    "IF the user input contains **ANY** of the following:\n"
+                    "1.  Facts about a company (e.g., location, revenue, industry, size, business type).\n"
+                    "2.  A desire for money/funds/grants (e.g., \"I want funding\", \"cari dana\", \"apply grant\").\n"
+                    "3.  Phrases like \"Check my eligibility\", \"Cari geran\", \"My business is...\".\n\n"
+                    "**ACTION:**\n"
+                    "Stop. Do not generate a sentence. Do not say \"Sure\" or \"Let me check\". \n"
+                    "Output strictly this token and nothing else:\n"
+                    "<<REDIRECT_TO_SEARCH>>\n\n"
+                    "---\n\n"
+                    "### RULE 2: GENERAL CHAT (Priority Low)\n"
+                    "IF and ONLY IF the input does **not** trigger Rule 1 (e.g., greetings, general questions about definitions like \"What is MDEC?\", \"How does this app work?\"):\n"
+                    "1.  Reply helpfully as a Malaysian Government Grant consultant.\n"
+                    "2.  Use the user's language (BM/English/Manglish).\n\n"
+                    "---\n\n"
+                    "### IMPORTANT NEGATIVE CONSTRAINTS (For Rule 1):\n"
+                    "- DO NOT say \"I will help you find a grant.\"\n"
+                    "- DO NOT say \"Redirecting you now...\"\n"
+                    "- DO NOT say \"Here is the token.\"\n"
+                    "- JUST output the token: <<REDIRECT_TO_SEARCH>>"
+                )
+            }
+        }
+    ],
+})
+# Static tails of every chat rows/add body; only table_id and the message vary.
+_MESSAGE_BODY_TAIL = b'}],"stream":false}'
+_STREAM_MESSAGE_BODY_TAIL = b'}],"stream":true}'
+
+
+def redirect_state(head: str) -> Optional[bool]:
+    """True once `head` starts with the redirect token, False once it cannot, None while undecided."""
+    text = head.lstrip()
+    if text.startswith(REDIRECT_TOKEN):
+        return True
+    if REDIRECT_TOKEN.startswith(text):
+        return None
+    return False
+
 
 class ChatTableService:
     def __init__(self):
         self.base_url = settings.jamai_base_url.rstrip("/") if settings.jamai_base_url else None
         self.project_id = settings.jamai_project_id
         self.api_key = settings.jamai_api_key
-        self._headers: Dict[str, str] | None = None
-        self.agent_id = "User_Chat_Agent"
+        self._headers: Dict[str, str] = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        self.agent_id = _AGENT_ID
+        self._config_error: Optional[str] = self._missing_config_message()
+        # The parent agent table only has to be confirmed once per process.
+        self._agent_ready: bool = False
+        self._agent_lock = threading.Lock()
+        # One pooled HTTP/2 client for every JamAI call so connections and TLS sessions are reused.
+        # The transport carries http2/limits; connect failures get one retry before surfacing.
+        self._client = httpx.Client(
+            base_url=self.base_url or "",
+            headers=self._headers,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            transport=httpx.HTTPTransport(http2=True, limits=_POOL_LIMITS, retries=1),
+        )
+        # Async twin used by the request handlers so a slow LLM reply doesn't hold a worker thread.
+        self._aclient = httpx.AsyncClient(
+            base_url=self.base_url or "",
+            headers=self._headers,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            transport=httpx.AsyncHTTPTransport(http2=True, limits=_POOL_LIMITS, retries=1),
+        )
+
+    def close(self) -> None:
+        self._client.close()
+
+    async def aclose(self) -> None:
+        await self._aclient.aclose()
 
-    def _ensure_configured(self) -> Tuple[str, Dict[str, str]]:
+    def _missing_config_message(self) -> Optional[str]:
         missing = []
         if not self.base_url:
             missing.append("JAMAI_BASE_URL")
@@ -21,159 +117,227 @@ class ChatTableService:
         if not self.api_key:
             missing.append("JAMAI_API_KEY")
 
-        if missing:
-            missing_vars = ", ".join(missing)
-            raise RuntimeError(
-                f"JamAI integration is not configured. Set the following environment variables: {missing_vars}"
-            )
+        if not missing:
+            return None
+        missing_vars = ", ".join(missing)
+        return f"JamAI integration is not configured. Set the following environment variables: {missing_vars}"
 
-        if self._headers is None:
-            self._headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            }
+    def _ensure_configured(self) -> None:
+        # Settings are read once per process, so the check itself runs only in __init__.
+        if self._config_error is not None:
+            raise RuntimeError(self._config_error)
 
-        return self.base_url, self._headers
+    def _record_agent_response(self, response: httpx.Response) -> None:
+        if response.status_code in (200, 409):
+            with self._agent_lock:
+                self._agent_ready = True
+        else:
+            logger.error("Failed to ensure agent %s: %s", self.agent_id, response.text)
 
     def ensure_agent(self):
         """
         Ensures the fixed User_Chat_Agent table exists.
         """
-        base_url, headers = self._ensure_configured()
-        url = f"{base_url}/gen_tables/chat"
-        payload = {
-            "id": self.agent_id,
-            "cols": [
-                {"id": "User", "dtype": "str"},
-                {
-                    "id": "AI", 
-                    "dtype": "str",
-                    "gen_config": {
-                        "model": "gemini-1.5-flash",
-                        "system_prompt": (
-                            "You are a Routing Logic Engine for the MYGeranHub application.\n\n"
-                            "**YOUR SOLE FUNCTION:**\n"
-                            "Classify the user input and route it accordingly.\n\n"
-                            "---\n\n"
-                            "### RULE 1: THE TRAP (Priority High)\n"
-                            "IF the user input contains **ANY** of the following:\n"
-                            "1.  Facts about a company (e.g., location, revenue, industry, size, business type).\n"
-                            "2.  A desire for money/funds/grants (e.g., \"I want funding\", \"cari dana\", \"apply grant\").\n"
-                            "3.  Phrases like \"Check my eligibility\", \"Cari geran\", \"My business is...\".\n\n"
-                            "**ACTION:**\n"
-                            "Stop. Do not generate a sentence. Do not say \"Sure\" or \"Let me check\". \n"
-                            "Output strictly this token and nothing else:\n"
-                            "<<REDIRECT_TO_SEARCH>>\n\n"
-                            "---\n\n"
-                            "### RULE 2: GENERAL CHAT (Priority Low)\n"
-                            "IF and ONLY IF the input does **not** trigger Rule 1 (e.g., greetings, general questions about definitions like \"What is MDEC?\", \"How does this app work?\"):\n"
-                            "1.  Reply helpfully as a Malaysian Government Grant consultant.\n"
-                            "2.  Use the user's language (BM/English/Manglish).\n\n"
-                            "---\n\n"
-                            "### IMPORTANT NEGATIVE CONSTRAINTS (For Rule 1):\n"
-                            "- DO NOT say \"I will help you find a grant.\"\n"
-                            "- DO NOT say \"Redirecting you now...\"\n"
-                            "- DO NOT say \"Here is the token.\"\n"
-                            "- JUST output the token: <<REDIRECT_TO_SEARCH>>"
-                        )
-                    }
-                }
-            ],
-        }
-        
+        if self._agent_ready:
+            return
+        self._ensure_configured()
         try:
-            with httpx.Client() as client:
-                response = client.post(url, headers=headers, json=payload, timeout=30.0)
-                if response.status_code not in [200, 409]:
-                     print(f"Failed to ensure agent {self.agent_id}: {response.text}")
+            response = self._client.post(
+                _CHAT_TABLE_PATH, content=_AGENT_PAYLOAD_BYTES, timeout=30.0
+            )
+            self._record_agent_response(response)
         except Exception as e:
-            print(f"Error ensuring agent: {e}")
+            logger.error("Error ensuring agent: %s", e)
 
-    def create_chat_table(self, user_id: str) -> Dict[str, Any]:
+    async def ensure_agent_async(self):
         """
-        Creates a new Chat Table in JamAI Base for the given user, by duplicating the User_Chat_Agent.
+        Async variant of ensure_agent.
         """
-        self.ensure_agent()
+        if self._agent_ready:
+            return
+        self._ensure_configured()
+        try:
+            response = await self._aclient.post(
+                _CHAT_TABLE_PATH, content=_AGENT_PAYLOAD_BYTES, timeout=30.0
+            )
+            self._record_agent_response(response)
+        except Exception as e:
+            logger.error("Error ensuring agent: %s", e)
 
-        # Table ID must be unique.
-        table_id = f"{self.agent_id}_{user_id}"
-        
-        # Use the duplicate endpoint to create a child table
-        base_url, headers = self._ensure_configured()
-        url = f"{base_url}/gen_tables/chat/duplicate"
-        
-        params = {
+    def _duplicate_params(self, table_id: str) -> Dict[str, Any]:
+        return {
             "table_id_src": self.agent_id,
             "table_id_dst": table_id,
             "include_data": False,
             "create_as_child": True
         }
 
+    def _parse_duplicate_response(self, response: httpx.Response, table_id: str) -> Dict[str, Any]:
+        if response.status_code == 200:
+            return orjson.loads(response.content)
+        elif response.status_code == 409:
+            # Table might already exist
+            # We should probably fetch it to return the details
+            return {"id": table_id, "status": "exists", "parent_id": self.agent_id}
+        else:
+            logger.error("Failed to create table. Status: %s, Response: %s", response.status_code, response.text)
+            raise Exception(f"JamAI API Error: {response.text}")
+
+    def create_chat_table(self, user_id: str) -> Dict[str, Any]:
+        """
+        Creates a new Chat Table in JamAI Base for the given user, by duplicating the User_Chat_Agent.
+        """
+        self.ensure_agent()
+
+        # Table ID must be unique.
+        table_id = f"{self.agent_id}_{user_id}"
+
         try:
-            with httpx.Client() as client:
-                response = client.post(url, headers=headers, params=params, timeout=30.0)
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 409:
-                    # Table might already exist
-                    # We should probably fetch it to return the details
-                    return {"id": table_id, "status": "exists", "parent_id": self.agent_id}
-                else:
-                    print(f"Failed to create table. Status: {response.status_code}, Response: {response.text}")
-                    raise Exception(f"JamAI API Error: {response.text}")
+            # Use the duplicate endpoint to create a child table
+            response = self._client.post(
+                _CHAT_DUPLICATE_PATH, params=self._duplicate_params(table_id), timeout=30.0
+            )
+            return self._parse_duplicate_response(response, table_id)
+        except Exception as e:
+            logger.error("Error creating chat table: %s", e)
+            raise
+
+    async def create_chat_table_async(self, user_id: str) -> Dict[str, Any]:
+        """
+        Async variant of create_chat_table.
+        """
+        await self.ensure_agent_async()
+
+        table_id = f"{self.agent_id}_{user_id}"
+
+        try:
+            response = await self._aclient.post(
+                _CHAT_DUPLICATE_PATH, params=self._duplicate_params(table_id), timeout=30.0
+            )
+            return self._parse_duplicate_response(response, table_id)
         except Exception as e:
-            print(f"Error creating chat table: {e}")
+            logger.error("Error creating chat table: %s", e)
             raise
 
+    def _message_body(self, table_id: str, message: str, stream: bool = False) -> bytes:
+        # Equivalent to orjson.dumps({"table_id": ..., "data": [{"User": ...}], "stream": False});
+        # the two variable strings are still escaped by orjson.
+        return b"".join((
+            b'{"table_id":', orjson.dumps(table_id),
+            b',"data":[{"User":', orjson.dumps(message),
+            _STREAM_MESSAGE_BODY_TAIL if stream else _MESSAGE_BODY_TAIL,
+        ))
+
+    def _check_chat_response(self, response: httpx.Response) -> bytes:
+        if response.status_code != 200:
+            logger.error("Failed to send message. Status: %s, Response: %s", response.status_code, response.text)
+            raise Exception(f"JamAI API Error: {response.text}")
+        return response.content
+
     def send_message(self, user_id: str, message: str) -> str:
         """
         Sends a message to the chat table and returns the AI response.
         """
         table_id = f"{self.agent_id}_{user_id}"
-        base_url, headers = self._ensure_configured()
-        url = f"{base_url}/gen_tables/chat/rows/add"
-        
-        payload = {
-            "table_id": table_id,
-            "data": [{"User": message}],
-            "stream": False
-        }
+        self._ensure_configured()
+        url = _CHAT_ROWS_ADD_PATH
 
         try:
-            with httpx.Client() as client:
-                response = client.post(url, headers=headers, json=payload, timeout=60.0)
-                
-                # If table not found (404), try to create it and retry
-                if response.status_code == 404:
-                    print(f"Table {table_id} not found. Creating it...")
-                    self.create_chat_table(user_id)
-                    # Retry the request
-                    response = client.post(url, headers=headers, json=payload, timeout=60.0)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    # Extract AI response from the first row
-                    rows = data.get("rows", [])
-                    if rows:
-                        ai_col = rows[0].get("columns", {}).get("AI")
-                        if ai_col:
-                            choices = ai_col.get("choices", [])
-                            if choices:
-                                return choices[0].get("message", {}).get("content", "")
-                    return "Error: No response from AI."
-                else:
-                    print(f"Failed to send message. Status: {response.status_code}, Response: {response.text}")
-                    raise Exception(f"JamAI API Error: {response.text}")
+            body = self._message_body(table_id, message)
+            response = self._client.post(url, content=body, timeout=60.0)
+
+            # If table not found (404), try to create it and retry
+            if response.status_code == 404:
+                logger.info("Table %s not found. Creating it...", table_id)
+                self.create_chat_table(user_id)
+                # Retry the request
+                response = self._client.post(url, content=body, timeout=60.0)
+
+            data = orjson.loads(self._check_chat_response(response))
+            # Extract AI response from the first row
+            rows = data.get("rows", [])
+            if rows:
+                ai_col = rows[0].get("columns", {}).get("AI")
+                if ai_col:
+                    choices = ai_col.get("choices", [])
+                    if choices:
+                        return choices[0].get("message", {}).get("content", "")
+            return "Error: No response from AI."
         except Exception as e:
-            print(f"Error sending message: {e}")
+            logger.error("Error sending message: %s", e)
             raise
 
-    def run_scout_action(self, user_text: str) -> str:
+    @staticmethod
+    def _parse_stream_line(line: str) -> str:
+        """Return the AI text carried by one SSE line of a streamed rows/add response."""
+        if not line.startswith("data:"):
+            return ""
+        data = line[5:].strip()
+        if not data or data == "[DONE]":
+            return ""
+        chunk = orjson.loads(data)
+        if chunk.get("output_column_name", "AI") != "AI":
+            return ""
+        choices = chunk.get("choices") or []
+        if not choices:
+            return ""
+        message = choices[0].get("delta") or choices[0].get("message") or {}
+        return message.get("content") or ""
+
+    async def stream_message_async(self, user_id: str, message: str) -> AsyncIterator[str]:
+        """
+        Sends a message to the chat table with streaming on and yields the AI reply as it
+        is generated. Closing the generator early cancels the upstream request.
+        """
+        table_id = f"{self.agent_id}_{user_id}"
+        self._ensure_configured()
+        url = _CHAT_ROWS_ADD_PATH
+        body = self._message_body(table_id, message, stream=True)
+
+        for attempt in range(2):
+            async with self._aclient.stream("POST", url, content=body, timeout=60.0) as response:
+                if response.status_code == 404 and attempt == 0:
+                    logger.info("Table %s not found. Creating it...", table_id)
+                    await self.create_chat_table_async(user_id)
+                    continue
+                if response.status_code != 200:
+                    await response.aread()
+                    logger.error("Failed to stream message. Status: %s, Response: %s", response.status_code, response.text)
+                    raise Exception(f"JamAI API Error: {response.text}")
+                async for line in response.aiter_lines():
+                    delta = self._parse_stream_line(line)
+                    if delta:
+                        yield delta
+                return
+
+    async def send_message_or_redirect(self, user_id: str, message: str) -> Optional[str]:
+        """
+        Streams the chat reply and returns it in full, or None if it contains the redirect
+        token. A reply that starts with the token (what the routing prompt asks for) is cut
+        off right there; one that mentions it later is only recognised once it has arrived.
+        """
+        parts = []
+        state: Optional[bool] = None
+        chunks = self.stream_message_async(user_id, message)
+        try:
+            async for delta in chunks:
+                parts.append(delta)
+                if state is None:
+                    state = redirect_state("".join(parts))
+                    if state:
+                        return None
+        finally:
+            await chunks.aclose()
+        reply = "".join(parts)
+        if REDIRECT_TOKEN in reply:
+            return None
+        return reply
+
+    async def run_scout_action(self, user_text: str) -> str:
         """
         Runs the Scout Action Table to determine follow-up questions or completion.
         """
-        base_url, headers = self._ensure_configured()
-        url = f"{base_url}/gen_tables/action/rows/add"
+        self._ensure_configured()
         
         # Explicitly targeting the Action Table ID
         # User confirmed the table name is "First_Grant"
@@ -186,40 +350,45 @@ class ChatTableService:
             "stream": False
         }
         
-        print(f"DEBUG: Sending to Action Table '{table_id}' with payload: {payload}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Sending to Action Table %r with payload: %s", table_id, payload)
 
         try:
-            with httpx.Client() as client:
-                response = client.post(url, headers=headers, json=payload, timeout=60.0)
-                print(f"DEBUG: Action Table Response ({response.status_code}): {response.text}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    rows = data.get("rows", [])
-                    if rows:
-                        # Extract Follow_Up_Questions from the response
-                        cols = rows[0].get("columns", {})
-                        follow_up = cols.get("Follow_Up_Questions")
-                        if follow_up:
-                            # Handle both direct value or choices structure depending on API response
-                            if isinstance(follow_up, dict) and "choices" in follow_up:
-                                choices = follow_up.get("choices", [])
-                                if choices:
-                                    return choices[0].get("message", {}).get("content", "")
-                            elif isinstance(follow_up, dict) and "value" in follow_up:
-                                return str(follow_up.get("value", ""))
-                            elif isinstance(follow_up, str):
-                                return follow_up
-                            
-                    return "Error: No output from Scout Action."
-                else:
-                    print(f"Failed to run scout action. Status: {response.status_code}, Response: {response.text}")
-                    raise Exception(f"JamAI API Error: {response.text}")
+            response = await self._aclient.post(
+                _ACTION_ROWS_ADD_PATH, content=orjson.dumps(payload), timeout=60.0
+            )
+            if debug:
+                # response.text decodes the whole body, so skip it unless it will be logged
+                logger.debug("Action Table Response (%s): %s", response.status_code, response.text)
+            
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                rows = data.get("rows", [])
+                if rows:
+                    # Extract Follow_Up_Questions from the response
+                    cols = rows[0].get("columns", {})
+                    follow_up = cols.get("Follow_Up_Questions")
+                    if follow_up:
+                        # Handle both direct value or choices structure depending on API response
+                        if isinstance(follow_up, dict) and "choices" in follow_up:
+                            choices = follow_up.get("choices", [])
+                            if choices:
+                                return choices[0].get("message", {}).get("content", "")
+                        elif isinstance(follow_up, dict) and "value" in follow_up:
+                            return str(follow_up.get("value", ""))
+                        elif isinstance(follow_up, str):
+                            return follow_up
+                        
+                return "Error: No output from Scout Action."
+            else:
+                logger.error("Failed to run scout action. Status: %s, Response: %s", response.status_code, response.text)
+                raise Exception(f"JamAI API Error: {response.text}")
         except Exception as e:
-            print(f"Error running scout action: {e}")
+            logger.error("Error running scout action: %s", e)
             raise
 
-    def handle_incoming_message(self, user_id: str, user_text: str) -> Dict[str, Any]:
+    async def handle_incoming_message(self, user_id: str, user_text: str) -> Dict[str, Any]:
         """
         Orchestrates the chat flow:
         1. Sends message to Chat Table.
@@ -227,13 +396,12 @@ class ChatTableService:
         3. If redirect, calls Scout Action Table.
         4. Returns appropriate response format.
         """
-        # Step A: Call existing send_message (Chat Table)
-        chat_response = self.send_message(user_id, user_text)
+        # Step A + B: Stream the Chat Table reply, stopping early on the redirect token
+        chat_response = await self.send_message_or_redirect(user_id, user_text)
 
-        # Step B: Check for redirect token
-        if "<<REDIRECT_TO_SEARCH>>" in chat_response:
+        if chat_response is None:
             # Do NOT return this text to user. Call Scout Action.
-            scout_output = self.run_scout_action(user_text)
+            scout_output = await self.run_scout_action(user_text)
             
             # Logic Gate
             if "COMPLETE" in scout_output:
@@ -1,9 +1,88 @@
-from jamaibase import JamAI, types as p
-from typing import Dict, Any, Optional
+import hashlib
+import logging
+import re
+import threading
+import httpx
+import orjson
+from cachetools import LFUCache, TTLCache
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
 from ..core.config import settings
-from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Middle lines beyond this are dropped so the profile sent to the Detective stays bounded;
+# the first line (usually the business description) is always kept.
+MAX_BUFFER_LINES = 40
+# With SPECULATIVE_JUDGE on, the Judge is started alongside the Detective once the profile
+# has this many turns and a COMPLETE analysis is likely. A Judge call that has already
+# started still runs to completion (and writes its row) when the Detective says INCOMPLETE.
+SPECULATIVE_JUDGE_MIN_TURNS = 8
+# Profiles shorter than this are asked for more detail locally; the Detective would
+# only answer INCOMPLETE anyway.
+MIN_WORDS_FOR_DETECTIVE = 15
+_PROFILE_FOLLOW_UP = (
+    "Tell me more about your company \u2014 what industry are you in, how many staff "
+    "do you have, and what's your revenue range?"
+)
+
+
+def _append_turn(buffer: str, new_input: str) -> str:
+    lines = f"{buffer}\nUser: {new_input}".strip().split("\n")
+    if len(lines) > MAX_BUFFER_LINES:
+        lines = lines[:1] + lines[-(MAX_BUFFER_LINES - 1):]
+    return "\n".join(lines)
+
+
+# Labels in the order the substring fallback checks them
+_GUARD_LABELS = ("EXIT_INTENT", "GIBBERISH", "INTERRUPTION", "VALID_ANSWER")
+# INCOMPLETE is listed so it is recognised (as "not done") rather than read as COMPLETE
+_ANALYSIS_LABELS = ("NO_GRANTS_FOUND", "INCOMPLETE", "COMPLETE", "ANALYSIS_READY", "SUFFICIENT")
+_GUARD_TAGS = frozenset(_GUARD_LABELS)
+_ANALYSIS_TAGS = frozenset(_ANALYSIS_LABELS)
+_DONE_TAGS = frozenset({"COMPLETE", "ANALYSIS_READY", "SUFFICIENT"})
+_LABEL_PATTERNS = {
+    label: re.compile(rf"\b{label}\b") for label in _GUARD_LABELS + _ANALYSIS_LABELS
+}
+
+
+def _match_label(text: str, labels: Tuple[str, ...], known: FrozenSet[str]) -> str:
+    """Label an LLM reply by its leading word, or by the first label it mentions."""
+    # Only the first word is uppercased on the fast path; Analysis replies can be long
+    words = text.split(None, 1)
+    tag = words[0].strip(":.,*").upper() if words else ""
+    if tag in known:
+        return tag
+    # Verbose replies: take the first label mentioned as a whole word anywhere in the text
+    upper = text.upper()
+    for label in labels:
+        if _LABEL_PATTERNS[label].search(upper):
+            return label
+    return ""
+
+
+def _get_col_text(col_data: Any) -> str:
+    # Column values are plain JSON: a string, {"value": ...}, or a chat completion payload
+    if col_data is None:
+        return ""
+    col_type = type(col_data)
+    if col_type is str:
+        return col_data
+    if col_type is dict:
+        if "value" in col_data:
+            return str(col_data["value"])
+        choices = col_data.get("choices")
+        if choices:
+            return choices[0].get("message", {}).get("content") or ""
+    return str(col_data)
+
 
 class GrantAgent:
+    # Inputs obvious enough to classify without asking the Guardrail table
+    _EXIT_RE = re.compile(r"^\s*(exit|quit|cancel|stop|nvm|nevermind|end|bye)[.!?]*\s*$", re.IGNORECASE)
+    _GIBBERISH_RE = re.compile(r"^[\W_]*$|^(.)\1{4,}$")
+    _QUESTION_PREFIXES = ("what", "how", "why", "when", "where", "can you")
+
     def __init__(self):
         self.project_id = settings.jamai_project_id
         self.api_key = settings.jamai_api_key
@@ -21,16 +100,48 @@ class GrantAgent:
         if not all([self.project_id, self.api_key, self.base_url]):
              raise RuntimeError("JamAI configuration missing for GrantAgent.")
 
-        self.client = JamAI(
-            project_id=self.project_id,
-            token=self.api_key,
-            api_base=self.base_url
+        # Plain JSON over one pooled client instead of the SDK, so each turn skips
+        # building and validating RowAddRequest/response models.
+        self._rows_add_url = f"{self.base_url}/v2/gen_tables/action/rows/add"
+        self._http = httpx.Client(
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "X-PROJECT-ID": self.project_id,
+                "Content-Type": "application/json",
+            },
+            http2=True,
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
         )
         
         # Table IDs
         self.table_1_id = "First_Grant"
         self.table_guard_id = "Input_Guardrail"
         self.table_2_id = "Final_Grant"
+        self._guard_tpl = {"table_id": self.table_guard_id, "stream": False}
+        self._detective_tpl = {"table_id": self.table_1_id, "stream": False}
+        self._judge_tpl = {"table_id": self.table_2_id, "stream": False}
+        # Speculative Judge and interruption-chat calls
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="grant-agent")
+        # Guardrail verdicts keyed by (last question, normalised answer); short replies like
+        # "yes"/"no"/"stop" repeat constantly. cachetools caches need external locking.
+        self._guard_cache: LFUCache = LFUCache(maxsize=50_000)
+        self._guard_cache_lock = threading.Lock()
+        # Detective (analysis, next question) per normalised profile. Expires because the
+        # answer depends on the knowledge table, which grows with every grant sync.
+        self._detective_cache: TTLCache = TTLCache(maxsize=10_000, ttl=3600)
+        self._detective_cache_lock = threading.Lock()
+
+    def _looks_like_question(self, text: str) -> bool:
+        return "?" in text or text.lstrip().lower().startswith(self._QUESTION_PREFIXES)
+
+    def _post_rows(self, template: Dict[str, Any], data: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        response = self._http.post(self._rows_add_url, content=orjson.dumps({**template, "data": data}))
+        response.raise_for_status()
+        return orjson.loads(response.content).get("rows") or []
+
+    def _run_judge(self, buffer: str) -> List[Dict[str, Any]]:
+        return self._post_rows(self._judge_tpl, [{"Follow_Up_Answer": buffer}])
 
     def process_input(self, session_state: Dict[str, Any], new_input: str) -> Dict[str, Any]:
         """
@@ -40,18 +151,6 @@ class GrantAgent:
         current_buffer = session_state.get("buffer", "")
         last_question = session_state.get("last_question", "What is your business profile?") # Default if none
 
-        # Helper to safely get text content from column response
-        def get_col_text(col_data):
-            if col_data is None:
-                return ""
-            if hasattr(col_data, "text"):
-                return col_data.text
-            if isinstance(col_data, dict) and "value" in col_data:
-                return str(col_data["value"])
-            if hasattr(col_data, "choices") and col_data.choices:
-                return col_data.choices[0].message.content
-            return str(col_data)
-
         # 1. Logic Split: First Input vs Follow-up
         # If buffer is empty, it's the first input (redirected from Chat Table).
         # We skip the Guardrail and go straight to the Detective.
@@ -68,39 +167,51 @@ class GrantAgent:
         else:
             # --- FOLLOW-UP PATH (Guardrail Active) ---
             # Call Input Guardrail (Check if the new input is valid/relevant to the last question)
+            guard_key = hashlib.sha256(
+                f"{last_question}\x1f{new_input.strip().lower()}".encode("utf-8")
+            ).hexdigest()
+            user_id = session_state.get("user_id")
+            chat_future: Optional[Future] = None
             try:
-                completion_guard = self.client.table.add_table_rows(
-                    "action",
-                    p.RowAddRequest(
-                        table_id=self.table_guard_id,
-                        data=[{
-                            "Last_Question": last_question,
-                            "User_Input": new_input
-                        }],
-                        stream=False
+                if self._EXIT_RE.match(new_input):
+                    classification = "EXIT_INTENT"
+                elif self._GIBBERISH_RE.match(new_input.strip()):
+                    classification = "GIBBERISH"
+                else:
+                    with self._guard_cache_lock:
+                        classification = self._guard_cache.get(guard_key)
+
+                if classification is None:
+                    if user_id and settings.speculative_interruption_chat and self._looks_like_question(new_input):
+                        from .chat_table_service import chat_table_service
+                        chat_future = self._executor.submit(
+                            chat_table_service.send_message, user_id, new_input
+                        )
+
+                    guard_rows = self._post_rows(
+                        self._guard_tpl,
+                        [{"Last_Question": last_question, "User_Input": new_input}],
                     )
+
+                    if not guard_rows:
+                        logger.warning("Guardrail table returned no rows.")
+                        classification = "VALID_ANSWER" # Fallback
+                    else:
+                        row_guard = guard_rows[0]
+                        classification = _get_col_text(row_guard.get("columns", {}).get("Classification"))
+                        if classification:
+                            with self._guard_cache_lock:
+                                self._guard_cache[guard_key] = classification
+
+                logger.debug(
+                    "Guard Input: %s | Last Q: %s | Classification: %s",
+                    new_input, last_question, classification,
                 )
-                
-                if not completion_guard.rows:
-                    print("Guardrail table failed.")
-                    classification = "VALID_ANSWER" # Fallback
-                else:
-                    row_guard = completion_guard.rows[0]
-                    classification = get_col_text(row_guard.columns.get("Classification"))
-                    
-                    # Log to file
-                    try:
-                        with open("debug_grant_manager.log", "a", encoding="utf-8") as f:
-                            f.write(f"Guard Input: {new_input} | Last Q: {last_question}\n")
-                            f.write(f"Guard Classification: {classification}\n")
-                            f.write("-" * 20 + "\n")
-                    except:
-                        pass
 
                 # Logic based on Classification
-                class_upper = classification.upper()
+                tag = _match_label(classification, _GUARD_LABELS, _GUARD_TAGS)
                 
-                if "EXIT_INTENT" in class_upper:
+                if tag == "EXIT_INTENT":
                     session_state["buffer"] = ""
                     session_state["status"] = "IDLE" # Reset session status
                     return {
@@ -109,21 +220,22 @@ class GrantAgent:
                         "updated_buffer": ""
                     }
                     
-                elif "GIBBERISH" in class_upper:
+                elif tag == "GIBBERISH":
                     return {
                         "status": "ASKING",
                         "reply": f"I didn't understand that. {last_question}",
                         "updated_buffer": current_buffer
                     }
                     
-                elif "INTERRUPTION" in class_upper:
+                elif tag == "INTERRUPTION":
                     # Scenario B: Interruption
                     # 1. Protect Buffer (Do not update session_state["buffer"])
                     
                     # 2. Call General Chat
-                    user_id = session_state.get("user_id")
                     if not user_id:
                          chat_response = "I can't answer that right now."
+                    elif chat_future is not None:
+                         chat_response = chat_future.result()
                     else:
                          # Need to import chat_table_service at top, but for now use local import to avoid circular dep if any
                          from .chat_table_service import chat_table_service
@@ -144,89 +256,86 @@ class GrantAgent:
                         "updated_buffer": current_buffer
                     }
                     
-                elif "VALID_ANSWER" in class_upper:
-                    updated_buffer = f"{current_buffer}\nUser: {new_input}".strip()
+                elif tag == "VALID_ANSWER":
+                    updated_buffer = _append_turn(current_buffer, new_input)
                     session_state["buffer"] = updated_buffer
                 
                 else:
                     # Fallback
-                    print(f"Unknown classification: {classification}")
-                    updated_buffer = f"{current_buffer}\nUser: {new_input}".strip()
+                    logger.warning("Unknown classification: %s", classification)
+                    updated_buffer = _append_turn(current_buffer, new_input)
                     session_state["buffer"] = updated_buffer
 
             except Exception as e:
-                print(f"Guardrail Error: {e}")
+                logger.error("Guardrail Error: %s", e)
                 # Fallback to appending if guard fails
-                updated_buffer = f"{current_buffer}\nUser: {new_input}".strip()
+                updated_buffer = _append_turn(current_buffer, new_input)
                 session_state["buffer"] = updated_buffer
+            finally:
+                # Not an interruption after all: drop the prefetch if it hasn't started
+                if chat_future is not None:
+                    chat_future.cancel()
 
         # 3. Call Table 1 (Detective / First Grant) - Analyze overall state
         # Only proceed if we updated the buffer (i.e., VALID_ANSWER or Fallback)
         # If we returned early (INTERRUPTION, GIBBERISH, EXIT), this won't run.
         
+        profile_too_short = len(updated_buffer.split()) < MIN_WORDS_FOR_DETECTIVE
+        judge_future: Optional[Future] = None
+        if (
+            settings.speculative_judge
+            and not profile_too_short
+            and updated_buffer.count("\n") + 1 >= SPECULATIVE_JUDGE_MIN_TURNS
+        ):
+            judge_future = self._executor.submit(self._run_judge, updated_buffer)
+
         try:
-            # Temporary Debug: Log buffer
-            try:
-                with open("debug_buffer.log", "w", encoding="utf-8") as f:
-                    f.write(f"--- Updated Buffer at {datetime.now()} ---\n")
-                    f.write(updated_buffer)
-                    f.write("\n------------------------------------------\n")
-            except Exception as e:
-                print(f"Buffer log error: {e}")
-
-            completion_1 = self.client.table.add_table_rows(
-                "action",
-                p.RowAddRequest(
-                    table_id=self.table_1_id,
-                    data=[{"Basic_Company_Profile": updated_buffer}],
-                    stream=False
+            detective_key = hashlib.sha256(
+                " ".join(updated_buffer.lower().split()).encode("utf-8")
+            ).hexdigest()
+            with self._detective_cache_lock:
+                cached = self._detective_cache.get(detective_key)
+
+            if cached is not None:
+                analysis, next_question = cached
+            elif profile_too_short:
+                session_state["last_question"] = _PROFILE_FOLLOW_UP
+                return {
+                    "status": "ASKING",
+                    "reply": _PROFILE_FOLLOW_UP,
+                    "updated_buffer": updated_buffer
+                }
+            else:
+                detective_rows = self._post_rows(
+                    self._detective_tpl, [{"Basic_Company_Profile": updated_buffer}]
                 )
-            )
-            
-            # DEBUG: Log full response
-            try:
-                with open("debug_jamai_response.log", "w", encoding="utf-8") as f:
-                    f.write(f"=== JamAI Response at {datetime.now()} ===\n")
-                    f.write(f"Input sent: {updated_buffer}\n")
-                    f.write(f"Completion type: {type(completion_1)}\n")
-                    f.write(f"Completion: {completion_1}\n")
-                    if completion_1.rows:
-                        row = completion_1.rows[0]
-                        f.write(f"\nRow type: {type(row)}\n")
-                        f.write(f"Row: {row}\n")
-                        f.write(f"\nColumns: {row.columns}\n")
-                        for col_name, col_val in row.columns.items():
-                            f.write(f"\n  {col_name}: {col_val}\n")
-                            f.write(f"    Type: {type(col_val)}\n")
-            except Exception as e:
-                print(f"Debug log error: {e}")
-            
-            if not completion_1.rows:
-                return {"status": "ERROR", "reply": "No response from First Grant Agent."}
-                
-            row_1 = completion_1.rows[0]
-            cols_1 = row_1.columns
-            
-            analysis = get_col_text(cols_1.get("Analysis"))
-            next_question = get_col_text(cols_1.get("Follow_Up_Questions"))
+
+                # The row repr is large, so don't even build it unless DEBUG is on
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Detective input: %s\nrows=%r", updated_buffer, detective_rows)
+
+                if not detective_rows:
+                    return {"status": "ERROR", "reply": "No response from First Grant Agent."}
+
+                cols_1 = detective_rows[0].get("columns", {})
+
+                analysis = _get_col_text(cols_1.get("Analysis"))
+                next_question = _get_col_text(cols_1.get("Follow_Up_Questions"))
+                if analysis:
+                    with self._detective_cache_lock:
+                        self._detective_cache[detective_key] = (analysis, next_question)
             
             # Update last_question for next turn
             session_state["last_question"] = next_question
 
             # 4. Logic Gate (Check Analysis from Detective)
-            analysis_upper = analysis.upper()
+            analysis_tag = _match_label(analysis, _ANALYSIS_LABELS, _ANALYSIS_TAGS)
             
-            # Debug Log
-            print(f"DEBUG: Checking Analysis: {analysis_upper}")
-            try:
-                with open("debug_grant_manager.log", "a", encoding="utf-8") as f:
-                    f.write(f"Checking Analysis: {analysis}\n")
-            except:
-                pass
+            logger.debug("Checking Analysis: %s", analysis)
             
             # Handle NO_GRANTS_FOUND case
-            if "NO_GRANTS_FOUND" in analysis_upper:
-                print("DEBUG: No grants found. Returning no-match message.")
+            if analysis_tag == "NO_GRANTS_FOUND":
+                logger.debug("No grants found. Returning no-match message.")
                 session_state["buffer"] = ""
                 return {
                     "status": "DONE",
@@ -234,39 +343,28 @@ class GrantAgent:
                     "updated_buffer": ""
                 }
             
-            if "COMPLETE" in analysis_upper or "ANALYSIS_READY" in analysis_upper or "SUFFICIENT" in analysis_upper:
-                print("DEBUG: Analysis Complete. Triggering Final Grant.")
-                # 5. Trigger Table 3 (Final Grant / Judge)
-                judge_completion = self.client.table.add_table_rows(
-                    "action",
-                    p.RowAddRequest(
-                        table_id=self.table_2_id,
-                        data=[{"Follow_Up_Answer": updated_buffer}],
-                        stream=False
-                    )
-                )
+            if analysis_tag in _DONE_TAGS:
+                logger.debug("Analysis Complete. Triggering Final Grant.")
+                # 5. Trigger Table 3 (Final Grant / Judge), reusing the speculative call if started
+                if judge_future is not None:
+                    judge_rows = judge_future.result()
+                    judge_future = None
+                else:
+                    judge_rows = self._run_judge(updated_buffer)
                 
-                if not judge_completion.rows:
+                if not judge_rows:
                      return {"status": "ERROR", "reply": "No response from Judge Agent."}
 
-                judge_row = judge_completion.rows[0]
+                judge_columns = judge_rows[0].get("columns", {})
                 
-                # Debug: Log Judge Columns
-                try:
-                    with open("debug_grant_manager.log", "a", encoding="utf-8") as f:
-                        f.write(f"Judge Columns: {list(judge_row.columns.keys())}\n")
-                        # Try to find the right column if Final_RAG is missing
-                        val = get_col_text(judge_row.columns.get("Final_RAG"))
-                        f.write(f"Extracted Verdict (Final_RAG): {val}\n")
-                except:
-                    pass
-
-                verdict = get_col_text(judge_row.columns.get("Final_RAG"))
+                logger.debug("Judge Columns: %s", list(judge_columns))
+
+                verdict = _get_col_text(judge_columns.get("Final_RAG"))
                 
                 # Fallback: if verdict is empty, try 'Output' or 'Response'
                 if not verdict:
                     for col in ["Output", "Response", "Answer", "result"]:
-                        val = get_col_text(judge_row.columns.get(col))
+                        val = _get_col_text(judge_columns.get(col))
                         if val:
                             verdict = val
                             break
@@ -278,7 +376,7 @@ class GrantAgent:
                     "updated_buffer": ""
                 }
             else:
-                print("DEBUG: Analysis Incomplete. Returning Question.")
+                logger.debug("Analysis Incomplete. Returning Question.")
                 # Still gathering info
                 return {
                     "status": "ASKING",
@@ -287,7 +385,12 @@ class GrantAgent:
                 }
 
         except Exception as e:
-            print(f"Error in GrantAgent: {e}")
+            logger.error("Error in GrantAgent: %s", e)
             return {"status": "ERROR", "reply": f"System Error: {str(e)}"}
+        finally:
+            # Detective said INCOMPLETE (or failed): this only helps if the Judge is still
+            # queued; a call that already started runs to completion regardless
+            if judge_future is not None:
+                judge_future.cancel()
 
 grant_agent = GrantAgent()
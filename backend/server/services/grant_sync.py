@@ -1,13 +1,23 @@
+import atexit
 import json
 import logging
-from typing import Any, Dict, List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import httpx
+import orjson
 
 from ..core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Knowledge rows sent per rows/add request; keeps each call well inside JamAI's limits.
+KNOWLEDGE_INSERT_BATCH_SIZE = 25
+# Concurrent single-row inserts when a batch has to be retried row by row.
+KNOWLEDGE_INSERT_WORKERS = 8
+# Action table rows fetched per list call while scanning for pending grants.
+PENDING_ROWS_PAGE_SIZE = 10
+
 
 class RowSkip(Exception):
     """Raised when a row should be skipped but still marked to avoid reprocessing."""
@@ -25,7 +35,19 @@ class RowFailure(Exception):
         super().__init__(reason)
 
 
+class JamAIRequestError(RuntimeError):
+    """Raised when JamAI answers a request with an HTTP error status."""
+
+    def __init__(self, message: str, status_code: int) -> None:
+        self.status_code = status_code
+        super().__init__(message)
+
+
 class GrantSyncService:
+    # Preferred keys, in order, when a grant JSON node is a dict rather than plain text
+    _NORMALIZE_KEYS = ("value", "text", "description", "range", "summary")
+    _EXTRACT_KEYS = ("description", "text", "value", "range")
+
     def __init__(self) -> None:
         self.base_url = (settings.jamai_base_url or "").rstrip("/")
         self.project_id = settings.jamai_project_id
@@ -41,8 +63,21 @@ class GrantSyncService:
         if self.project_id:
             self.headers["X-PROJECT-ID"] = self.project_id
         self._api_prefix = "/api/v2"
+        # Paths are a handful of constants, so each full URL is resolved once.
+        self._url_cache: Dict[str, str] = {}
         self._action_table_columns: Set[str] | None = None
         self._knowledge_table_ready = False
+        # One pooled client for the whole sync cycle so list/insert/patch calls reuse connections.
+        self._client = httpx.Client(
+            headers=self.headers,
+            http2=True,
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+        )
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        self._client.close()
 
     def _ensure_configuration(self) -> None:
         missing: List[str] = []
@@ -72,33 +107,42 @@ class GrantSyncService:
         timeout: float = 30.0,
     ) -> Dict[str, Any]:
         url = self._compose_url(path)
-        headers = self.headers
 
-        if not headers.get("Authorization"):
+        if not self.headers.get("Authorization"):
             raise RuntimeError("JamAI API key is not configured")
 
-        with httpx.Client(timeout=timeout) as client:
+        try:
+            response = self._client.request(
+                method,
+                url,
+                params=params,
+                content=orjson.dumps(json_payload) if json_payload is not None else None,
+                timeout=timeout,
+            )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:  # noqa: PERF203
+            detail: str
             try:
-                response = client.request(
-                    method, url, headers=headers, params=params, json=json_payload
-                )
-                response.raise_for_status()
-            except httpx.HTTPStatusError as exc:  # noqa: PERF203
-                detail: str
-                try:
-                    detail = json.dumps(exc.response.json())
-                except ValueError:
-                    detail = exc.response.text
-                raise RuntimeError(
-                    f"JamAI API error {exc.response.status_code} for "
-                    f"{exc.request.method} {exc.request.url}: {detail}"
-                ) from exc
-
-            if response.content:
-                return response.json()
-            return {}
+                detail = json.dumps(exc.response.json())
+            except ValueError:
+                detail = exc.response.text
+            raise JamAIRequestError(
+                f"JamAI API error {exc.response.status_code} for "
+                f"{exc.request.method} {exc.request.url}: {detail}",
+                exc.response.status_code,
+            ) from exc
+
+        if response.content:
+            return orjson.loads(response.content)
+        return {}
 
     def _compose_url(self, path: str) -> str:
+        url = self._url_cache.get(path)
+        if url is None:
+            url = self._url_cache[path] = self._resolve_url(path)
+        return url
+
+    def _resolve_url(self, path: str) -> str:
         base = self.base_url
         if not base:
             raise RuntimeError("JamAI base URL is not configured")
@@ -177,14 +221,12 @@ class GrantSyncService:
     def _get_table_metadata(self, table_type: str, table_id: str) -> Optional[Dict[str, Any]]:
         url = self._compose_url(f"/gen_tables/{table_type}")
         params = {"table_id": table_id}
-        headers = self.headers
 
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(url, headers=headers, params=params)
-            if response.status_code == 404:
-                return None
-            response.raise_for_status()
-            return response.json()
+        response = self._client.get(url, params=params)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
     def _ensure_sync_status_column(self) -> None:
         if not self.sync_status_column:
@@ -370,64 +412,139 @@ class GrantSyncService:
         self._ensure_configuration()
         self._ensure_sync_status_column()
         limit = max(1, min(limit, 100))
-        rows = self._list_pending_rows(limit=limit)
 
         summary = {
-            "processed": len(rows),
+            "processed": 0,
             "synced": 0,
             "failed": 0,
             "skipped": 0,
         }
         updates: Dict[str, Dict[str, str]] = {}
+        prepared: List[Tuple[str, Dict[str, Optional[str]]]] = []
+        status_col = self.sync_status_column
+        truncate = self._truncate_status
 
-        for row in rows:
+        for row in self._iter_pending_rows(limit=limit):
+            summary["processed"] += 1
             row_id = self._extract_row_id(row)
             try:
                 payload = self._prepare_knowledge_payload(row)
             except RowSkip as skip_exc:
                 summary["skipped"] += 1
-                updates[row_id] = {
-                    self.sync_status_column: self._truncate_status(f"skipped: {skip_exc.reason}")
-                }
+                updates[row_id] = {status_col: truncate(f"skipped: {skip_exc.reason}")}
                 continue
             except RowFailure as failure_exc:
                 summary["failed"] += 1
-                updates[row_id] = {
-                    self.sync_status_column: self._truncate_status(f"failed: {failure_exc.reason}")
-                }
+                updates[row_id] = {status_col: truncate(f"failed: {failure_exc.reason}")}
                 continue
 
-            try:
-                self._insert_knowledge_row(payload)
-            except Exception as exc:  # noqa: BLE001 - surface upstream errors
-                summary["failed"] += 1
-                updates[row_id] = {
-                    self.sync_status_column: self._truncate_status(f"failed: {exc}")
-                }
-                continue
+            prepared.append((row_id, payload))
+            # Insert each full batch while the next page is still to be listed
+            if len(prepared) >= KNOWLEDGE_INSERT_BATCH_SIZE:
+                self._insert_knowledge_chunk(prepared, summary, updates)
+                prepared = []
 
-            summary["synced"] += 1
-            updates[row_id] = {self.sync_status_column: "synced"}
+        if prepared:
+            self._insert_knowledge_chunk(prepared, summary, updates)
 
         if updates:
             self._update_action_rows(updates)
 
         return summary
 
-    def _list_pending_rows(self, limit: int) -> List[Dict[str, Any]]:
-        params = {
-            "table_id": self.scrap_table_id,
-            "limit": limit,
-        }
+    def _insert_knowledge_chunk(
+        self,
+        chunk: List[Tuple[str, Dict[str, Optional[str]]]],
+        summary: Dict[str, int],
+        updates: Dict[str, Dict[str, str]],
+    ) -> None:
+        try:
+            self._insert_knowledge_rows([payload for _, payload in chunk])
+        except Exception as exc:  # noqa: BLE001 - surface upstream errors
+            # Only a 4xx means JamAI rejected the batch without storing it; after a timeout or
+            # 5xx the rows may already be in, and retrying them would duplicate knowledge rows.
+            # Table setup errors aren't row-specific, so only retry once the table is known good.
+            rejected = isinstance(exc, JamAIRequestError) and 400 <= exc.status_code < 500
+            if len(chunk) > 1 and rejected and self._knowledge_table_ready:
+                logger.warning(
+                    "Batch insert of %d knowledge rows failed, retrying individually: %s",
+                    len(chunk),
+                    exc,
+                )
+                self._insert_knowledge_rows_individually(chunk, summary, updates)
+                return
+            for row_id, _ in chunk:
+                self._record_insert_result(row_id, summary, updates, exc)
+            return
 
-        data = self._request(
-            "GET",
-            "/gen_tables/action/rows/list",
-            params=params,
-        )
-        rows = self._normalize_rows(data)
-        filtered_rows: List[Dict[str, Any]] = []
+        for row_id, _ in chunk:
+            self._record_insert_result(row_id, summary, updates)
+
+    def _insert_knowledge_rows_individually(
+        self,
+        chunk: List[Tuple[str, Dict[str, Optional[str]]]],
+        summary: Dict[str, int],
+        updates: Dict[str, Dict[str, str]],
+    ) -> None:
+        # Each insert is independent HTTP I/O; results are recorded on this thread only.
+        with ThreadPoolExecutor(max_workers=min(KNOWLEDGE_INSERT_WORKERS, len(chunk))) as executor:
+            futures = {
+                executor.submit(self._insert_knowledge_rows, [payload]): row_id
+                for row_id, payload in chunk
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as exc:  # noqa: BLE001 - surface upstream errors
+                    self._record_insert_result(futures[future], summary, updates, exc)
+                else:
+                    self._record_insert_result(futures[future], summary, updates)
+
+    def _record_insert_result(
+        self,
+        row_id: str,
+        summary: Dict[str, int],
+        updates: Dict[str, Dict[str, str]],
+        exc: Optional[Exception] = None,
+    ) -> None:
+        if exc is None:
+            summary["synced"] += 1
+            updates[row_id] = {self.sync_status_column: "synced"}
+        else:
+            summary["failed"] += 1
+            updates[row_id] = {self.sync_status_column: self._truncate_status(f"failed: {exc}")}
+
+    def _iter_pending_rows(
+        self, limit: int, page_size: int = PENDING_ROWS_PAGE_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield syncable rows among the first `limit` action rows, one page at a time."""
         status_updates: Dict[str, Dict[str, str]] = {}
+        offset = 0
+        while offset < limit:
+            page_limit = min(page_size, limit - offset)
+            data = self._request(
+                "GET",
+                "/gen_tables/action/rows/list",
+                params={
+                    "table_id": self.scrap_table_id,
+                    "offset": offset,
+                    "limit": page_limit,
+                },
+            )
+            rows = self._normalize_rows(data)
+            for row in self._filter_pending_rows(rows, status_updates):
+                yield row
+            if len(rows) < page_limit:
+                break
+            offset += page_limit
+
+        # Applied after the scan so the rejected-row patches can't shift later pages
+        if status_updates:
+            self._update_action_rows(status_updates)
+
+    def _filter_pending_rows(
+        self, rows: List[Dict[str, Any]], status_updates: Dict[str, Dict[str, str]]
+    ) -> Iterator[Dict[str, Any]]:
         for row in rows:
             columns = row.get("columns", {})
             row_id = self._extract_row_id(row)
@@ -447,12 +564,7 @@ class GrantSyncService:
 
             if not self._should_consider_row(columns):
                 continue
-            filtered_rows.append(row)
-
-        if status_updates:
-            self._update_action_rows(status_updates)
-
-        return filtered_rows
+            yield row
 
     def _should_consider_row(self, columns: Dict[str, Any]) -> bool:
         status = self._extract_column_value(columns, self.sync_status_column)
@@ -513,8 +625,8 @@ class GrantSyncService:
             if not stripped:
                 return None
             try:
-                return json.loads(stripped)
-            except json.JSONDecodeError as exc:
+                return orjson.loads(stripped)
+            except orjson.JSONDecodeError as exc:
                 raise RowFailure(f"invalid JSON in grant_final: {exc}") from exc
         return value
 
@@ -526,28 +638,21 @@ class GrantSyncService:
             or grant_data.get("documentRequired")
         )
 
+        # `or` chains so later fallbacks are only walked when earlier ones come up empty
+        extract = self._extract_text
+        normalize = self._normalize_text
         knowledge_row = {
-            "grant_name": self._first_non_empty(
-                self._extract_text(grant_data.get("grantName")),
-                grant_data.get("grant_name"),
-            ),
-            "grant_period": self._first_non_empty(
-                self._extract_text(grant_data.get("period")),
-                grant_data.get("grant_period"),
-            ),
-            "grant_description": self._first_non_empty(
-                self._extract_text(grant_data.get("grantDescription")),
-                grant_data.get("grant_description"),
-            ),
-            "eligibility_criteria": self._first_non_empty(
-                self._extract_text(grant_data.get("eligibilityCriteria")),
-                self._extract_text(grant_data.get("eligibility_criteria")),
-                self._extract_text((grant_data.get("grantDescription") or {}).get("eligibilityCriteria")),
-            ),
-            "application_steps": self._first_non_empty(
-                self._extract_text((application_process or {}).get("steps")),
-                self._extract_text(grant_data.get("application_steps")),
-            ),
+            "grant_name": extract(grant_data.get("grantName"))
+            or normalize(grant_data.get("grant_name")),
+            "grant_period": extract(grant_data.get("period"))
+            or normalize(grant_data.get("grant_period")),
+            "grant_description": extract(grant_data.get("grantDescription"))
+            or normalize(grant_data.get("grant_description")),
+            "eligibility_criteria": extract(grant_data.get("eligibilityCriteria"))
+            or extract(grant_data.get("eligibility_criteria"))
+            or extract((grant_data.get("grantDescription") or {}).get("eligibilityCriteria")),
+            "application_steps": extract((application_process or {}).get("steps"))
+            or extract(grant_data.get("application_steps")),
             "document_required": self._format_required_documents(required_documents_section),
         }
 
@@ -560,58 +665,59 @@ class GrantSyncService:
 
         return knowledge_row
 
-    def _first_non_empty(self, *candidates: Optional[str]) -> Optional[str]:
-        for candidate in candidates:
-            normalized = self._normalize_text(candidate)
-            if normalized:
-                return normalized
-        return None
-
     def _normalize_text(self, value: Any) -> Optional[str]:
+        value_type = type(value)
+        if value_type is str:
+            return value.strip() or None
         if value is None:
             return None
-        if isinstance(value, (int, float)):
-            return str(value)
-        if isinstance(value, str):
-            stripped = value.strip()
-            return stripped or None
-        if isinstance(value, dict):
-            for key in ("value", "text", "description", "range", "summary"):
+        if value_type is dict:
+            for key in self._NORMALIZE_KEYS:
                 if key in value:
                     normalized = self._normalize_text(value[key])
                     if normalized:
                         return normalized
             return None
-        if isinstance(value, list):
-            normalized_items = [self._normalize_text(item) for item in value]
-            normalized_items = [item for item in normalized_items if item]
-            if normalized_items:
-                return "\n".join(normalized_items)
+        if value_type is list:
+            normalized_items: List[str] = []
+            for item in value:
+                normalized = self._normalize_text(item)
+                if normalized:
+                    normalized_items.append(normalized)
+            return "\n".join(normalized_items) if normalized_items else None
+        if isinstance(value, (int, float)):
+            return str(value)
+        if isinstance(value, str):
+            return value.strip() or None
         return None
 
     def _extract_text(self, node: Any) -> Optional[str]:
+        node_type = type(node)
+        if node_type is str:
+            return node.strip() or None
         if node is None:
             return None
-        if isinstance(node, (str, int, float)):
-            return self._normalize_text(node)
-        if isinstance(node, dict):
-            for key in ("description", "text", "value", "range"):
+        if node_type is dict:
+            for key in self._EXTRACT_KEYS:
                 if key in node:
                     text = self._normalize_text(node[key])
                     if text:
                         return text
             # If node itself has nested content like steps.files, collapse recursively.
-            nested_values = [self._extract_text(value) for value in node.values()]
-            nested_values = [value for value in nested_values if value]
-            if nested_values:
-                return "\n".join(nested_values)
+            children = node.values()
+        elif node_type is list:
+            children = node
+        elif isinstance(node, (str, int, float)):
+            return self._normalize_text(node)
+        else:
             return None
-        if isinstance(node, list):
-            nested_values = [self._extract_text(item) for item in node]
-            nested_values = [value for value in nested_values if value]
-            if nested_values:
-                return "\n".join(nested_values)
-        return None
+
+        nested_values: List[str] = []
+        for child in children:
+            text = self._extract_text(child)
+            if text:
+                nested_values.append(text)
+        return "\n".join(nested_values) if nested_values else None
 
     def _format_required_documents(self, section: Any) -> Optional[str]:
         if not section:
@@ -635,13 +741,17 @@ class GrantSyncService:
                     return "\n".join(lines)
         return self._extract_text(section)
 
-    def _insert_knowledge_row(self, payload: Dict[str, Optional[str]]) -> None:
+    def _insert_knowledge_rows(self, payloads: List[Dict[str, Optional[str]]]) -> None:
         self._ensure_knowledge_table()
         json_payload = {
             "table_id": self.grants_table_id,
-            "data": [payload],
+            # Unset optional fields are omitted rather than sent as explicit nulls
+            "data": [
+                {key: value for key, value in payload.items() if value is not None}
+                for payload in payloads
+            ],
             "stream": False,
-            "concurrent": False,
+            "concurrent": len(payloads) > 1,
         }
         self._request(
             "POST",
@@ -664,7 +774,7 @@ class GrantSyncService:
         )
 
     def _truncate_status(self, value: str, limit: int = 200) -> str:
-        return value if len(value) <= limit else f"{value[:limit-3]}..."
+        return value[: limit - 3] + "..." if len(value) > limit else value
 
 
 grant_sync_service = GrantSyncService()
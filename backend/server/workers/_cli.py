@@ -0,0 +1,38 @@
+"""Command-line arguments shared by the background workers."""
+
+from __future__ import annotations
+
+import argparse
+
+
+def add_common_args(parser: argparse.ArgumentParser, job: str, default_hour: int, default_minute: int) -> None:
+    """Add the --hour/--minute/--once/--verbose options every daily worker accepts."""
+    parser.add_argument(
+        "--hour",
+        type=int,
+        default=default_hour,
+        help=f"Hour (0-23) to run the {job}. Defaults to {default_hour}.",
+    )
+    parser.add_argument(
+        "--minute",
+        type=int,
+        default=default_minute,
+        help=f"Minute (0-59) to run the {job}. Defaults to {default_minute}.",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help=f"Run the {job} immediately and exit.",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Enable debug logging.",
+    )
+
+
+def validate_common_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if not 0 <= args.hour <= 23:
+        parser.error("hour must be between 0 and 23")
+    if not 0 <= args.minute <= 59:
+        parser.error("minute must be between 0 and 59")
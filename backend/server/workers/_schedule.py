@@ -0,0 +1,25 @@
+"""Daily schedule helpers shared by the background workers."""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def next_fire_epoch(hour: int, minute: int) -> float:
+    """Epoch seconds of the next local HH:MM, resolved through mktime so DST shifts are honoured."""
+    now = datetime.now()
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return target.timestamp()
+
+
+def wait_until(epoch: float, shutdown_event: threading.Event) -> None:
+    """Block until ``epoch`` or until shutdown is requested, never waking early."""
+    while not shutdown_event.is_set():
+        remaining = epoch - time.time()
+        if remaining <= 0:
+            return
+        shutdown_event.wait(remaining)
@@ -12,72 +12,132 @@ Run with:
 from __future__ import annotations
 
 import argparse
+import atexit
 import json
 import logging
+import math
+import queue
+import random
 import signal
-import sys
+import threading
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+from datetime import datetime
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, List, Optional, Set, Tuple
 
+import orjson
 from jamaibase import JamAI  # type: ignore[import-not-found]
 
 from agents.agent1 import run_scraper_job
 from agents.agent2 import run_grant_verifier
 from server.core.config import settings
+from server.core.log_config import configure_worker_logging
 from server.services.grant_sync import grant_sync_service
+from server.workers._cli import add_common_args, validate_common_args
+from server.workers._schedule import next_fire_epoch, wait_until
 
 DEFAULT_HOUR = 3
 DEFAULT_MINUTE = 30
-DEFAULT_DECIDER_TIMEOUT = 180  # seconds
-DEFAULT_DECIDER_POLL = 15  # seconds
+DEFAULT_DECIDER_TIMEOUT = 180  # seconds, until enough latency history exists
+DEFAULT_DECIDER_POLL = 15  # seconds, until enough latency history exists
+DECIDER_POLL_BUDGET = 8  # polls placed from the observed latency distribution
+DECIDER_TUNE_MIN_SAMPLES = 100  # history needed before timeout/interval are derived from it
+# Only completions inside the timeout are recorded, so a timeout at exactly p99 would
+# shrink a little every run; keep headroom above it.
+DECIDER_TIMEOUT_HEADROOM = 1.5
+# Floors for the derived bounds, so a history of fast runs can't leave a slow run no time
+DECIDER_MIN_TIMEOUT = 60.0  # seconds
+DECIDER_MIN_POLL = float(DEFAULT_DECIDER_POLL) / 3  # seconds
+DECIDER_MIN_SAMPLES = 20  # below this, fall back to the fixed poll interval
+DECIDER_MAX_SAMPLES = 500
+DECIDER_LIST_PAGE_SIZE = 100
+DECIDER_LIST_EXTRA_PAGES = 2  # pages listed beyond what the pending rows alone would fill
+DECIDER_BULK_MIN_ROWS = 5  # below this, per-row gets are cheaper than listing
+DECIDER_RETRY_BACKOFF = 1.3  # growth factor per consecutive fetch failure of a row
+DECIDER_RETRY_MAX_DELAY = 60.0  # seconds
+DECIDER_HYBRID_WINDOW = 2.0  # seconds of tight polling once the earliest expected completion passes
+DECIDER_HYBRID_TICK = 0.5  # seconds
+DECIDER_ERROR_SUMMARY_SECONDS = 60.0
+OBSERVABILITY_BATCH_SIZE = 64
+OBSERVABILITY_FLUSH_SECONDS = 1.0
+OBSERVABILITY_BUFFER_BYTES = 1 << 16
+_OBSERVABILITY_JSON_OPTS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
 
 logger = logging.getLogger(__name__)
 OBSERVABILITY_LOG_PATH = Path(__file__).resolve().parents[3] / "debug_grant_manager.log"
-_shutdown_requested = False
+DECIDER_STATS_PATH = OBSERVABILITY_LOG_PATH.with_name("decider_latency_stats.json")
+# Per-row fallback fetches are pure I/O, so fan them out; threads start only when used.
+_POLL_EXECUTOR = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4))
+# Runs the knowledge sync alongside grant_decider polling under --pipeline-parallel.
+_STAGE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-stage")
+_shutdown_event = threading.Event()
+_FLAT_ROWS = settings.jamai_flat_rows
+# Per-row fetch failures are summarised periodically instead of logged one by one.
+_fetch_error_counts: Dict[Tuple[str, str], int] = {}
+_fetch_errors_window_start = time.monotonic()
+# Per-row fetches that outlived their poll's cutoff; only touched from the polling thread.
+_inflight_fetches: Dict[Tuple[str, str], Future] = {}
+# One JamAI client per credential pair, kept across poll cycles and daily runs for keep-alive.
+_jamai_client: Optional[JamAI] = None
+_jamai_client_key: Optional[Tuple[str, str]] = None
+_jamai_client_lock = threading.Lock()
 
 
-def _configure_logging(verbose: bool) -> None:
-    level = logging.DEBUG if verbose else logging.INFO
-    logging.basicConfig(
-        level=level,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[logging.StreamHandler(sys.stdout)],
-    )
+class _LazyJSON:
+    """Defer encoding until a handler actually formats the log record."""
 
+    __slots__ = ("obj",)
 
-def _handle_signal(signum: int, frame) -> None:  # type: ignore[override]
-    global _shutdown_requested
-    logger.warning("Received signal %s. Graceful shutdown requested.", signum)
-    _shutdown_requested = True
+    def __init__(self, obj: object) -> None:
+        self.obj = obj
 
+    def __str__(self) -> str:
+        return orjson.dumps(self.obj, option=orjson.OPT_NON_STR_KEYS).decode()
 
-def _seconds_until(hour: int, minute: int) -> float:
-    now = datetime.now()
-    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    if target <= now:
-        target += timedelta(days=1)
-    delta = target - now
-    return delta.total_seconds()
+
+def _handle_signal(signum: int, frame) -> None:  # type: ignore[override]
+    logger.warning("Received signal %s. Graceful shutdown requested.", signum)
+    _shutdown_event.set()
 
 
 def _sleep_until_next_run(hour: int, minute: int) -> None:
-    wait_seconds = _seconds_until(hour, minute)
+    target = next_fire_epoch(hour, minute)
     logger.info(
         "Next grant pipeline run scheduled at %s (sleeping %.1f seconds)",
-        (datetime.now() + timedelta(seconds=wait_seconds)).strftime("%Y-%m-%d %H:%M:%S"),
-        wait_seconds,
+        datetime.fromtimestamp(target).strftime("%Y-%m-%d %H:%M:%S"),
+        target - time.time(),
     )
-    slept = 0.0
-    while slept < wait_seconds and not _shutdown_requested:
-        chunk = min(60.0, wait_seconds - slept)
-        time.sleep(chunk)
-        slept += chunk
+    wait_until(target, _shutdown_event)
+
+
+def _get_jamai_client(project_id: str, token: str) -> JamAI:
+    global _jamai_client, _jamai_client_key
+    key = (project_id, token)
+    client = _jamai_client
+    if client is not None and _jamai_client_key == key:
+        return client
+    with _jamai_client_lock:
+        if _jamai_client is None or _jamai_client_key != key:
+            _jamai_client = JamAI(project_id=project_id, token=token)
+            _jamai_client_key = key
+        return _jamai_client
+
+
+def _reset_jamai_client() -> None:
+    global _jamai_client, _jamai_client_key
+    with _jamai_client_lock:
+        _jamai_client = None
+        _jamai_client_key = None
 
 
 def _extract_column_value(row: Dict[str, object], column_name: str) -> Optional[str]:
+    if _FLAT_ROWS:
+        try:
+            return row[column_name]["value"].strip() or None  # type: ignore[index, union-attr]
+        except (KeyError, TypeError, AttributeError):
+            pass
     data = row.get(column_name)
     if data is None and "columns" in row and isinstance(row["columns"], dict):
         data = row["columns"].get(column_name)
@@ -93,30 +153,216 @@ def _extract_column_value(row: Dict[str, object], column_name: str) -> Optional[
     return None
 
 
+# Remembers, per response type, which of the probes below found the items list.
+_RESPONSE_ITEMS_KIND: Dict[type, str] = {}
+
+
 def _extract_response_items(response: Any) -> Optional[List[Any]]:
     if response is None:
         return None
+    kind = _RESPONSE_ITEMS_KIND.get(type(response))
+    if kind is not None:
+        try:
+            if kind == "attr_list":
+                result = response.items
+            elif kind == "callable":
+                result = response.items()
+            else:
+                result = response["items"]
+            if isinstance(result, list):
+                return result
+        except (AttributeError, KeyError, TypeError):
+            pass
+        # The shape drifted; probe again from scratch
+        _RESPONSE_ITEMS_KIND.pop(type(response), None)
+
     items_attr = getattr(response, "items", None)
-    if callable(items_attr):
+    if isinstance(response, dict):
+        result = response.get("items")
+        if isinstance(result, list):
+            _RESPONSE_ITEMS_KIND[type(response)] = "dict_key"
+            return result
+    elif callable(items_attr):
         try:
             result = items_attr()
             if isinstance(result, list):
+                _RESPONSE_ITEMS_KIND[type(response)] = "callable"
                 return result
         except TypeError:
             pass
     elif isinstance(items_attr, list):
+        _RESPONSE_ITEMS_KIND[type(response)] = "attr_list"
         return items_attr
-    if isinstance(response, dict):
-        result = response.get("items")
-        if isinstance(result, list):
-            return result
     return None
 
 
+def _load_decider_latencies() -> List[float]:
+    try:
+        samples = json.loads(DECIDER_STATS_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    if not isinstance(samples, list):
+        return []
+    return [float(value) for value in samples if isinstance(value, (int, float)) and value >= 0]
+
+
+def _record_decider_latencies(observed: List[float]) -> None:
+    if not observed:
+        return
+    samples = (_load_decider_latencies() + observed)[-DECIDER_MAX_SAMPLES:]
+    try:
+        DECIDER_STATS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        DECIDER_STATS_PATH.write_text(json.dumps(samples), encoding="utf-8")
+    except OSError as exc:
+        logger.warning("Failed to persist grant_decider latency stats: %s", exc)
+
+
+def _compute_poll_times(samples: List[float], timeout: float, budget: int) -> List[float]:
+    """
+    Offsets (seconds after polling starts) at which to poll again. Each poll is placed at an
+    equal step of the empirical completion CDF, so polls bunch where the decider usually
+    lands instead of being spread evenly over the whole timeout.
+    """
+    if len(samples) < DECIDER_MIN_SAMPLES or budget < 1:
+        return []
+    ordered = sorted(samples)
+    offsets: List[float] = []
+    for step in range(1, budget + 1):
+        # Last poll sits at the 99th percentile rather than the slowest outlier
+        quantile = min(step / budget, 0.99)
+        offset = ordered[max(0, math.ceil(quantile * len(ordered)) - 1)]
+        if 0 < offset < timeout and (not offsets or offset > offsets[-1]):
+            offsets.append(offset)
+    return offsets
+
+
+def _derive_decider_bounds(samples: List[float], budget: int) -> Tuple[Optional[float], float, float]:
+    """Return (p99, timeout, poll_interval), falling back to the defaults without enough history."""
+    if len(samples) < DECIDER_TUNE_MIN_SAMPLES or budget < 1:
+        return None, float(DEFAULT_DECIDER_TIMEOUT), float(DEFAULT_DECIDER_POLL)
+    ordered = sorted(samples)
+    p99 = ordered[max(0, math.ceil(0.99 * len(ordered)) - 1)]
+    timeout = max(DECIDER_MIN_TIMEOUT, p99 * DECIDER_TIMEOUT_HEADROOM)
+    return p99, timeout, max(DECIDER_MIN_POLL, p99 / budget)
+
+
+def _log_decider_bounds(budget: int) -> None:
+    samples = _load_decider_latencies()
+    p99, timeout, poll_interval = _derive_decider_bounds(samples, budget)
+    schedule = _compute_poll_times(samples, timeout, budget)
+    logger.info(
+        "grant_decider polling: %d samples, p99=%s, budget=%d, timeout=%.1fs, interval=%.1fs, schedule=%s",
+        len(samples),
+        f"{p99:.1f}s" if p99 is not None else "n/a",
+        budget,
+        timeout,
+        poll_interval,
+        [round(offset, 1) for offset in schedule],
+    )
+
+
+def _fetch_rows_bulk(client: JamAI, table_id: str, row_ids: Set[str]) -> Dict[str, Dict[str, object]]:
+    """
+    List the newest rows of the action table, keeping only the requested ones. This run's rows
+    are the newest, so a few pages normally cover them; whatever is not found within the page
+    cap is left to the caller.
+    """
+    found: Dict[str, Dict[str, object]] = {}
+    offset = 0
+    max_pages = math.ceil(len(row_ids) / DECIDER_LIST_PAGE_SIZE) + DECIDER_LIST_EXTRA_PAGES
+    for _ in range(max_pages):
+        response = client.table.list_table_rows(
+            "action",
+            table_id,
+            offset=offset,
+            limit=DECIDER_LIST_PAGE_SIZE,
+            columns=["grant_decider"],
+            order_ascending=False,
+        )
+        items = _extract_response_items(response) or []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            row_id = str(item.get("ID") or item.get("id") or item.get("row_id") or "")
+            if row_id in row_ids:
+                found[row_id] = item
+        if len(found) == len(row_ids) or len(items) < DECIDER_LIST_PAGE_SIZE:
+            break
+        offset += len(items)
+    return found
+
+
+def _note_fetch_error(row_id: str, exc: Exception) -> None:
+    """Log the first failure per (row, error type); later repeats are only counted."""
+    key = (row_id, type(exc).__name__)
+    if key not in _fetch_error_counts:
+        logger.warning("Failed to fetch row %s while waiting for grant_decider: %s", row_id, exc)
+    _fetch_error_counts[key] = _fetch_error_counts.get(key, 0) + 1
+    _flush_fetch_errors()
+
+
+def _flush_fetch_errors(force: bool = False) -> None:
+    global _fetch_errors_window_start
+    now = time.monotonic()
+    if not force and now - _fetch_errors_window_start < DECIDER_ERROR_SUMMARY_SECONDS:
+        return
+    by_type: Dict[str, int] = {}
+    for (_, error_type), count in _fetch_error_counts.items():
+        by_type[error_type] = by_type.get(error_type, 0) + count
+    for error_type, count in by_type.items():
+        logger.warning(
+            "grant_decider: %d row fetch failures of type %s in the last %.0fs",
+            count,
+            error_type,
+            now - _fetch_errors_window_start,
+        )
+    _fetch_error_counts.clear()
+    _fetch_errors_window_start = now
+
+
+def _fetch_rows_individually(
+    client: JamAI, table_id: str, row_ids: Set[str], timeout: float
+) -> Tuple[Dict[str, Dict[str, object]], Set[str]]:
+    """
+    Fetch rows concurrently. Returns the rows found and the IDs whose fetch raised; rows not
+    back within `timeout` are in neither and stay pending for the next cycle, which waits on
+    the same request instead of sending another.
+    """
+    found: Dict[str, Dict[str, object]] = {}
+    failed: Set[str] = set()
+    futures: Dict[Future, str] = {}
+    for row_id in row_ids:
+        future = _inflight_fetches.get((table_id, row_id))
+        if future is None:
+            future = _POLL_EXECUTOR.submit(client.table.get_table_row, "action", table_id, row_id)
+            _inflight_fetches[(table_id, row_id)] = future
+        futures[future] = row_id
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            row_id = futures[future]
+            del _inflight_fetches[(table_id, row_id)]
+            try:
+                response = future.result()
+            except Exception as exc:  # noqa: BLE001
+                _note_fetch_error(row_id, exc)
+                failed.add(row_id)
+                continue
+            items = _extract_response_items(response)
+            if items:
+                found[row_id] = items[0]
+            elif isinstance(response, dict):
+                # get_table_row returns the row itself rather than a page
+                found[row_id] = response
+    except FuturesTimeoutError:
+        logger.warning("Some row fetches were still running at the poll cutoff; retrying next cycle.")
+    return found, failed
+
+
 def _wait_for_grant_decider(
     row_ids: List[str],
-    timeout: int = DEFAULT_DECIDER_TIMEOUT,
-    poll_interval: int = DEFAULT_DECIDER_POLL,
+    timeout: Optional[float] = None,
+    poll_interval: Optional[float] = None,
+    budget: int = DECIDER_POLL_BUDGET,
 ) -> Dict[str, Optional[str]]:
     if not row_ids:
         return {}
@@ -128,40 +374,113 @@ def _wait_for_grant_decider(
         return {row_id: None for row_id in row_ids}
 
     table_id = settings.jamai_scrap_result_table_id or os.getenv("JAMAI_SCRAP_RESULT_TABLE_ID", "scrap_result")
-    client = JamAI(project_id=project_id, token=token)
+    client = _get_jamai_client(project_id, token)
+    samples = _load_decider_latencies()
+    _, derived_timeout, derived_poll = _derive_decider_bounds(samples, budget)
+    timeout = derived_timeout if timeout is None else timeout
+    poll_interval = derived_poll if poll_interval is None else poll_interval
     pending = set(row_ids)
     decider_results: Dict[str, Optional[str]] = {row_id: None for row_id in row_ids}
-    deadline = time.time() + max(1, timeout)
-
-    while pending and time.time() < deadline and not _shutdown_requested:
-        logger.info("Polling grant_decider for %d rows...", len(pending))
-        still_pending: List[str] = []
-        for row_id in list(pending):
-            try:
-                response = client.table.get_table_row("action", table_id, row_id)
-            except Exception as exc:  # noqa: BLE001
-                logger.warning("Failed to fetch row %s while waiting for grant_decider: %s", row_id, exc)
-                still_pending.append(row_id)
+    started = time.time()
+    deadline = started + max(1, timeout)
+    # Past the fitted schedule (or with too little history) keep the fixed interval
+    schedule = _compute_poll_times(samples, timeout, budget)
+    next_scheduled = 0  # index of the first fitted offset not yet reached
+    # Poll tightly just after the first fitted point, where fast completions cluster
+    hybrid_start = schedule[0] if schedule else None
+    observed: List[float] = []
+    # When each row was last fetched still undecided; its completion lies after that
+    last_undecided: Dict[str, float] = {}
+    # Rows whose fetch keeps failing are retried on a growing, jittered delay
+    fail_count: Dict[str, int] = {}
+    retry_after: Dict[str, float] = {}
+
+    while pending and time.time() < deadline and not _shutdown_event.is_set():
+        now = time.time()
+        due = {row_id for row_id in pending if retry_after.get(row_id, 0.0) <= now}
+        rows: Dict[str, Dict[str, object]] = {}
+        polled_at = now
+        if due:
+            logger.info("Polling grant_decider for %d rows...", len(due))
+            unfetched = due
+            if len(due) >= DECIDER_BULK_MIN_ROWS:
+                try:
+                    rows = _fetch_rows_bulk(client, table_id, due)
+                    # Rows outside the newest pages (or deleted ones) are fetched one by one
+                    unfetched = due - rows.keys()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("Bulk row listing failed, fetching rows one by one: %s", exc)
+            if unfetched:
+                fetched, failed = _fetch_rows_individually(
+                    client, table_id, unfetched, timeout=poll_interval * 0.8
+                )
+                rows.update(fetched)
+                if fetched and not failed:
+                    _flush_fetch_errors(force=True)
+                if not rows and len(failed) == len(unfetched):
+                    # Nothing got through (expired token, dead connection); start fresh next cycle
+                    _reset_jamai_client()
+                    client = _get_jamai_client(project_id, token)
+                for row_id in failed:
+                    fail_count[row_id] = fail_count.get(row_id, 0) + 1
+                    delay = min(DECIDER_RETRY_MAX_DELAY, poll_interval * DECIDER_RETRY_BACKOFF ** fail_count[row_id])
+                    retry_after[row_id] = time.time() + delay * random.uniform(0.5, 1.0)
+
+        # Only rows returned this cycle can change state
+        for row_id, row_data in rows.items():
+            if row_id not in pending:
                 continue
-
-            items = _extract_response_items(response)
-            row_data = items[0] if items else {}
-            decider_value = _extract_column_value(row_data, "grant_decider")
+            fail_count.pop(row_id, None)
+            retry_after.pop(row_id, None)
+            decider_value = _extract_column_value(row_data, "grant_decider") if row_data else None
             if decider_value:
                 decider_results[row_id] = decider_value
+                pending.discard(row_id)
+                # Rows never seen undecided (e.g. done by the first poll) say nothing about
+                # when they completed; the rest finished somewhere between the two polls.
+                seen_at = last_undecided.pop(row_id, None)
+                if seen_at is not None:
+                    observed.append((seen_at + polled_at) / 2 - started)
             else:
-                still_pending.append(row_id)
+                last_undecided[row_id] = polled_at
 
-        pending = set(still_pending)
         if pending:
-            time.sleep(poll_interval)
-
+            elapsed = time.time() - started
+            # Offsets are only passed once reached, so the hybrid ticks below never skip one
+            while next_scheduled < len(schedule) and schedule[next_scheduled] <= elapsed:
+                next_scheduled += 1
+            if next_scheduled < len(schedule):
+                wait = schedule[next_scheduled] - elapsed
+            else:
+                wait = poll_interval
+            if hybrid_start is not None and hybrid_start <= elapsed < hybrid_start + DECIDER_HYBRID_WINDOW:
+                wait = min(wait, DECIDER_HYBRID_TICK)
+            _shutdown_event.wait(max(0.0, min(wait, deadline - time.time())))
+
+    _flush_fetch_errors(force=True)
+    for row_id in row_ids:
+        # Late answers for this run are no longer wanted
+        _inflight_fetches.pop((table_id, row_id), None)
+    _record_decider_latencies(observed)
     if pending:
         logger.warning("grant_decider polling timed out for rows: %s", ", ".join(sorted(pending)))
     return decider_results
 
 
-def _run_pipeline(limit: Optional[int], max_candidates: Optional[int]) -> Dict[str, object]:
+def _run_knowledge_sync(limit: Optional[int]) -> Dict[str, object]:
+    try:
+        return grant_sync_service.sync_pending_grants(limit=limit or 20)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Knowledge sync failed: %s", exc)
+        return {"processed": 0, "synced": 0, "failed": 0, "skipped": 0, "error": str(exc)}
+
+
+def _run_pipeline(
+    limit: Optional[int],
+    max_candidates: Optional[int],
+    parallel: bool = False,
+    decider_budget: int = DECIDER_POLL_BUDGET,
+) -> Dict[str, object]:
     logger.info("Starting full grant pipeline run...")
     stage_summary: Dict[str, object] = {}
 
@@ -176,21 +495,24 @@ def _run_pipeline(limit: Optional[int], max_candidates: Optional[int]) -> Dict[s
     if row_ids:
         verifier_summary = run_grant_verifier(row_ids=row_ids)
         stage_summary["verifier"] = verifier_summary.to_dict()
-        decider_results = _wait_for_grant_decider(row_ids)
-        stage_summary["grant_decider"] = decider_results
+        if parallel:
+            # Sync whatever is already pending while this run's decisions come in;
+            # rows resolved during the poll are picked up by the next sync.
+            sync_future = _STAGE_EXECUTOR.submit(_run_knowledge_sync, limit)
+            try:
+                stage_summary["grant_decider"] = _wait_for_grant_decider(row_ids, budget=decider_budget)
+            finally:
+                stage_summary["knowledge_sync"] = sync_future.result()
+        else:
+            stage_summary["grant_decider"] = _wait_for_grant_decider(row_ids, budget=decider_budget)
     else:
         stage_summary["verifier"] = {"skipped": True, "reason": "no new/updated rows"}
         stage_summary["grant_decider"] = {}
 
-    try:
-        sync_result = grant_sync_service.sync_pending_grants(limit=limit or 20)
-    except Exception as exc:  # noqa: BLE001
-        logger.exception("Knowledge sync failed: %s", exc)
-        sync_result = {"processed": 0, "synced": 0, "failed": 0, "skipped": 0, "error": str(exc)}
-
-    stage_summary["knowledge_sync"] = sync_result
+    if "knowledge_sync" not in stage_summary:
+        stage_summary["knowledge_sync"] = _run_knowledge_sync(limit)
     _append_observability_log(stage_summary)
-    logger.info("Grant pipeline run completed: %s", json.dumps(stage_summary, indent=2))
+    logger.info("Grant pipeline run completed: %s", _LazyJSON(stage_summary))
     return stage_summary
 
 
@@ -199,12 +521,83 @@ def _append_observability_log(entry: Dict[str, object]) -> None:
         "timestamp": datetime.now().isoformat(),
         "entry": entry,
     }
+    # On a stalled writer drop the oldest entry, so the latest pipeline state survives
+    while True:
+        try:
+            _LOG_QUEUE.put_nowait(payload)
+            return
+        except queue.Full:
+            try:
+                _LOG_QUEUE.get_nowait()
+            except queue.Empty:
+                continue
+            _LOG_QUEUE.task_done()
+            logger.warning("Observability log queue is full; dropped the oldest entry.")
+
+
+def _write_observability_entries(entries: List[Dict[str, object]]) -> None:
+    global _observability_fh
     try:
-        OBSERVABILITY_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with OBSERVABILITY_LOG_PATH.open("a", encoding="utf-8") as fh:
-            fh.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        if _observability_fh is None:
+            OBSERVABILITY_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+            _observability_fh = OBSERVABILITY_LOG_PATH.open("ab", buffering=OBSERVABILITY_BUFFER_BYTES)
+        _observability_fh.write(b"".join(orjson.dumps(entry, option=_OBSERVABILITY_JSON_OPTS) for entry in entries))
+        _observability_fh.flush()
     except Exception as exc:  # noqa: BLE001
         logger.warning("Failed to append observability log: %s", exc)
+        _close_observability_log()
+
+
+def _close_observability_log() -> None:
+    global _observability_fh
+    fh, _observability_fh = _observability_fh, None
+    if fh is not None:
+        try:
+            fh.close()
+        except Exception:  # noqa: BLE001
+            pass
+
+
+def _log_consumer() -> None:
+    # Collect up to a batch or a second's worth of entries, then write and flush them together
+    while True:
+        entries = [_LOG_QUEUE.get()]
+        batch_deadline = time.monotonic() + OBSERVABILITY_FLUSH_SECONDS
+        while len(entries) < OBSERVABILITY_BATCH_SIZE:
+            remaining = batch_deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entries.append(_LOG_QUEUE.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _write_observability_entries(entries)
+        for _ in entries:
+            _LOG_QUEUE.task_done()
+
+
+def _flush_log_queue() -> None:
+    if _LOG_THREAD.is_alive():
+        _LOG_QUEUE.join()
+    else:
+        entries: List[Dict[str, object]] = []
+        while True:
+            try:
+                entries.append(_LOG_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+        if entries:
+            _write_observability_entries(entries)
+    _close_observability_log()
+
+
+# Observability entries are written off the pipeline thread to a file kept open for the
+# process lifetime, and drained at exit.
+_observability_fh: Optional[BinaryIO] = None
+_LOG_QUEUE: "queue.Queue[Dict[str, object]]" = queue.Queue(maxsize=4096)
+_LOG_THREAD = threading.Thread(target=_log_consumer, name="observability-log", daemon=True)
+_LOG_THREAD.start()
+atexit.register(_flush_log_queue)
 
 
 def run_worker(
@@ -213,9 +606,12 @@ def run_worker(
     limit: Optional[int],
     max_candidates: Optional[int],
     run_once: bool,
+    parallel: bool = False,
+    decider_budget: int = DECIDER_POLL_BUDGET,
 ) -> None:
+    _log_decider_bounds(decider_budget)
     if run_once:
-        _run_pipeline(limit, max_candidates)
+        _run_pipeline(limit, max_candidates, parallel, decider_budget)
         return
 
     logger.info(
@@ -224,22 +620,21 @@ def run_worker(
         minute,
     )
 
-    while not _shutdown_requested:
+    while not _shutdown_event.is_set():
         _sleep_until_next_run(hour, minute)
-        if _shutdown_requested:
+        if _shutdown_event.is_set():
             break
         try:
-            _run_pipeline(limit, max_candidates)
+            _run_pipeline(limit, max_candidates, parallel, decider_budget)
         except Exception as exc:  # noqa: BLE001
             logger.exception("Grant pipeline run failed: %s", exc)
 
     logger.info("Grant pipeline worker stopped.")
 
 
-def main(argv: Optional[List[str]] = None) -> None:
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Daily grant pipeline worker")
-    parser.add_argument("--hour", type=int, default=DEFAULT_HOUR, help="Hour (0-23) to run the pipeline.")
-    parser.add_argument("--minute", type=int, default=DEFAULT_MINUTE, help="Minute (0-59) to run the pipeline.")
+    add_common_args(parser, "pipeline", DEFAULT_HOUR, DEFAULT_MINUTE)
     parser.add_argument("--limit", type=int, default=None, help="Row limit for the knowledge sync stage.")
     parser.add_argument(
         "--max-candidates",
@@ -247,19 +642,33 @@ def main(argv: Optional[List[str]] = None) -> None:
         default=None,
         help="Optional cap for Agent 1 grant candidates per run.",
     )
-    parser.add_argument("--once", action="store_true", help="Run the pipeline immediately and exit.")
-    parser.add_argument("--verbose", action="store_true", help="Enable debug logging.")
+    parser.add_argument(
+        "--decider-budget",
+        type=int,
+        default=DECIDER_POLL_BUDGET,
+        help="Number of grant_decider polls to place across the observed latency distribution.",
+    )
+    parser.add_argument(
+        "--pipeline-parallel",
+        action="store_true",
+        help="Run the knowledge sync while grant_decider results are still being polled.",
+    )
+    return parser
+
 
-    args = parser.parse_args(argv)
-    _configure_logging(args.verbose)
+_PARSER = _build_parser()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _PARSER.parse_args(argv)
+    configure_worker_logging(args.verbose)
 
     signal.signal(signal.SIGINT, _handle_signal)
     signal.signal(signal.SIGTERM, _handle_signal)
 
-    if not 0 <= args.hour <= 23:
-        parser.error("hour must be between 0 and 23")
-    if not 0 <= args.minute <= 59:
-        parser.error("minute must be between 0 and 59")
+    validate_common_args(_PARSER, args)
+    if args.decider_budget < 1:
+        _PARSER.error("decider-budget must be at least 1")
 
     run_worker(
         hour=args.hour,
@@ -267,6 +676,8 @@ def main(argv: Optional[List[str]] = None) -> None:
         limit=args.limit,
         max_candidates=args.max_candidates,
         run_once=args.once,
+        parallel=args.pipeline_parallel,
+        decider_budget=args.decider_budget,
     )
 
 
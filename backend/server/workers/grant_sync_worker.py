@@ -10,51 +10,35 @@ from __future__ import annotations
 import argparse
 import logging
 import signal
-import sys
+import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 
+from ..core.log_config import configure_worker_logging
 from ..services.grant_sync import grant_sync_service
+from ._cli import add_common_args, validate_common_args
+from ._schedule import next_fire_epoch, wait_until
 
 DEFAULT_HOUR = 4
 DEFAULT_MINUTE = 0
 logger = logging.getLogger(__name__)
-_shutdown_requested = False
-
-
-def _configure_logging(verbose: bool) -> None:
-    level = logging.DEBUG if verbose else logging.INFO
-    logging.basicConfig(
-        level=level,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[logging.StreamHandler(sys.stdout)],
-    )
+_shutdown_event = threading.Event()
 
 
 def _handle_signal(signum: int, frame) -> None:  # type: ignore[override]
-    global _shutdown_requested
     logger.warning("Received signal %s. Graceful shutdown requested.", signum)
-    _shutdown_requested = True
-
-
-def _seconds_until(hour: int, minute: int) -> float:
-    now = datetime.now()
-    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    if target <= now:
-        target += timedelta(days=1)
-    delta = target - now
-    return delta.total_seconds()
+    _shutdown_event.set()
 
 
 def _sleep_until_next_run(hour: int, minute: int) -> None:
-    wait_seconds = _seconds_until(hour, minute)
-    logger.info("Next grant sync scheduled at %s (sleeping %.1f seconds)", (datetime.now() + timedelta(seconds=wait_seconds)).strftime("%Y-%m-%d %H:%M:%S"), wait_seconds)
-    slept = 0.0
-    while slept < wait_seconds and not _shutdown_requested:
-        chunk = min(60.0, wait_seconds - slept)
-        time.sleep(chunk)
-        slept += chunk
+    target = next_fire_epoch(hour, minute)
+    logger.info(
+        "Next grant sync scheduled at %s (sleeping %.1f seconds)",
+        datetime.fromtimestamp(target).strftime("%Y-%m-%d %H:%M:%S"),
+        target - time.time(),
+    )
+    wait_until(target, _shutdown_event)
 
 
 def _run_sync(limit: Optional[int]) -> None:
@@ -74,9 +58,9 @@ def run_worker(hour: int, minute: int, limit: Optional[int], run_once: bool) ->
         minute,
     )
 
-    while not _shutdown_requested:
+    while not _shutdown_event.is_set():
         _sleep_until_next_run(hour, minute)
-        if _shutdown_requested:
+        if _shutdown_event.is_set():
             break
         try:
             _run_sync(limit)
@@ -86,47 +70,29 @@ def run_worker(hour: int, minute: int, limit: Optional[int], run_once: bool) ->
     logger.info("Grant sync worker stopped.")
 
 
-def main(argv: list[str] | None = None) -> None:
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Daily grant sync worker")
-    parser.add_argument(
-        "--hour",
-        type=int,
-        default=DEFAULT_HOUR,
-        help="Hour (0-23) to run the sync. Defaults to 4.",
-    )
-    parser.add_argument(
-        "--minute",
-        type=int,
-        default=DEFAULT_MINUTE,
-        help="Minute (0-59) to run the sync. Defaults to 0.",
-    )
+    add_common_args(parser, "sync", DEFAULT_HOUR, DEFAULT_MINUTE)
     parser.add_argument(
         "--limit",
         type=int,
         default=None,
         help="Optional limit override for rows processed per run.",
     )
-    parser.add_argument(
-        "--once",
-        action="store_true",
-        help="Run the sync immediately and exit (useful for manual triggers).",
-    )
-    parser.add_argument(
-        "--verbose",
-        action="store_true",
-        help="Enable debug logging.",
-    )
+    return parser
+
+
+_PARSER = _build_parser()
 
-    args = parser.parse_args(argv)
-    _configure_logging(args.verbose)
+
+def main(argv: list[str] | None = None) -> None:
+    args = _PARSER.parse_args(argv)
+    configure_worker_logging(args.verbose)
 
     signal.signal(signal.SIGINT, _handle_signal)
     signal.signal(signal.SIGTERM, _handle_signal)
 
-    if not 0 <= args.hour <= 23:
-        parser.error("hour must be between 0 and 23")
-    if not 0 <= args.minute <= 59:
-        parser.error("minute must be between 0 and 59")
+    validate_common_args(_PARSER, args)
 
     run_worker(hour=args.hour, minute=args.minute, limit=args.limit, run_once=args.once)
 
@@ -0,0 +1,7 @@
+import os
+
+# Settings snapshot the environment on first import, and GrantAgent is built at import
+# time and refuses to start without JamAI settings, so provide placeholders up front.
+os.environ.setdefault("JAMAI_PROJECT_ID", "test-project")
+os.environ.setdefault("JAMAI_API_KEY", "test-key")
+os.environ.setdefault("JAMAI_BASE_URL", "http://jamai.test")
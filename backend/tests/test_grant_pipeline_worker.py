@@ -0,0 +1,66 @@
+"""Tests for the grant_decider polling loop in the pipeline worker."""
+
+import unittest
+from unittest import mock
+
+from server.workers import grant_pipeline_worker as worker
+
+_START = 1_000.0
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = _START
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class _FakeShutdownEvent:
+    """Never set; waiting just advances the fake clock."""
+
+    def __init__(self, clock: _FakeClock) -> None:
+        self.clock = clock
+
+    def is_set(self) -> bool:
+        return False
+
+    def wait(self, timeout: float) -> bool:
+        self.clock.now += timeout
+        return False
+
+
+class WaitForGrantDeciderScheduleTest(unittest.TestCase):
+    def test_hybrid_ticks_do_not_skip_scheduled_polls(self) -> None:
+        clock = _FakeClock()
+        poll_offsets = []
+
+        def fetch(client, table_id, row_ids, timeout):
+            poll_offsets.append(clock.now - _START)
+            return {row_id: {"grant_decider": None} for row_id in row_ids}, set()
+
+        # 80 samples at 1..80s fit the schedule [10, 20, ..., 80] with the default budget
+        samples = [float(i) for i in range(1, 81)]
+        with mock.patch.multiple(
+            worker,
+            time=clock,
+            _shutdown_event=_FakeShutdownEvent(clock),
+            _fetch_rows_individually=fetch,
+            _load_decider_latencies=lambda: samples,
+            _record_decider_latencies=lambda observed: None,
+            _get_jamai_client=lambda project_id, token: object(),
+        ), mock.patch.multiple(worker.settings, jamai_sdk_project_id="project", jamai_sdk_token="token"):
+            results = worker._wait_for_grant_decider(["row-1"], timeout=100, poll_interval=15)
+
+        self.assertEqual(results, {"row-1": None})
+        self.assertEqual(
+            poll_offsets,
+            [0, 10, 10.5, 11, 11.5, 12, 20, 30, 40, 50, 60, 70, 80, 95],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
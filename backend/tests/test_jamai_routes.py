@@ -0,0 +1,66 @@
+"""Tests for redirect handling in the streaming chat endpoint."""
+
+import unittest
+from unittest import mock
+
+import orjson
+
+from server.api import jamai_routes as routes
+
+
+def _decode(events):
+    payloads = []
+    for event in events:
+        body = event[len(b"data: "):].strip()
+        payloads.append(body.decode() if body == b"[DONE]" else orjson.loads(body))
+    return payloads
+
+
+class StreamEventsRedirectTest(unittest.IsolatedAsyncioTestCase):
+    async def _stream(self, deltas, session):
+        async def fake_stream(user_id, message):
+            for delta in deltas:
+                yield delta
+
+        async def fake_search(session, message):
+            return "search reply"
+
+        with mock.patch.object(routes.chat_table_service, "stream_message_async", fake_stream), mock.patch.object(
+            routes, "_run_grant_search", fake_search
+        ):
+            return _decode([event async for event in routes._stream_events(session, "user-1", "hi")])
+
+    def _session(self):
+        return {"buffer": "", "status": "IDLE", "user_id": "user-1"}
+
+    async def test_token_mid_stream_starts_grant_search(self) -> None:
+        session = self._session()
+        payloads = await self._stream(
+            ["Of course, let me look into grants for your business. ", "<<REDIRECT", "_TO_SEARCH>>"],
+            session,
+        )
+
+        self.assertEqual(session["status"], "ACTIVE_SEARCH")
+        self.assertEqual(payloads[-2:], [{"delta": "search reply"}, "[DONE]"])
+        for payload in payloads[:-2]:
+            self.assertNotIn("<<", payload["delta"])
+
+    async def test_token_after_short_prefix_starts_grant_search(self) -> None:
+        session = self._session()
+        payloads = await self._stream(["Sure! <<REDIRECT_TO", "_SEARCH>>"], session)
+
+        self.assertEqual(session["status"], "ACTIVE_SEARCH")
+        self.assertEqual(payloads, [{"delta": "search reply"}, "[DONE]"])
+
+    async def test_plain_reply_is_forwarded_in_full(self) -> None:
+        session = self._session()
+        deltas = ["Hello there, ", "how can I help you with ", "grants today?"]
+        payloads = await self._stream(deltas, session)
+
+        self.assertEqual(session["status"], "IDLE")
+        self.assertEqual(payloads[-1], "[DONE]")
+        self.assertEqual("".join(payload["delta"] for payload in payloads[:-1]), "".join(deltas))
+
+
+if __name__ == "__main__":
+    unittest.main()